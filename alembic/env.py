@@ -29,6 +29,24 @@ config.set_main_option("sqlalchemy.url", sync_db_url)
 target_metadata = Base.metadata
 
 
+# Added by 9e41b7c2d583 only when PostGIS is available and not mapped in the models
+POSTGIS_COLUMNS = {("city", "geog"), ("locality", "geog")}
+POSTGIS_INDEXES = {"ix_city_geog", "ix_locality_geog"}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Skip objects the migrations create conditionally (see app.models.location.SERVER_DEPENDENT)."""
+    if type_ == "index":
+        if reflected and name in POSTGIS_INDEXES:
+            return False
+        model_index = compare_to if reflected else object
+        if model_index is not None and model_index.info.get("server_dependent"):
+            return False
+    if type_ == "column" and reflected and (object.table.name, name) in POSTGIS_COLUMNS:
+        return False
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     url = config.get_main_option("sqlalchemy.url")
@@ -37,6 +55,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -53,7 +72,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
 
         with context.begin_transaction():
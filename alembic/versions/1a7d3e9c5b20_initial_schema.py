@@ -0,0 +1,134 @@
+"""Initial schema: users and location tables
+
+Revision ID: 1a7d3e9c5b20
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+
+Databases created before migrations were tracked already have these tables;
+everything here is created only if missing, so stamping past it is not needed.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1a7d3e9c5b20'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Enum types store the member names (SQLAlchemy's default for python enums)
+ENUMS = [
+    postgresql.ENUM("MALE", "FEMALE", "OTHER", name="gender_enum", create_type=False),
+    postgresql.ENUM("EMAIL", "PHONE", name="login_method_enum", create_type=False),
+    postgresql.ENUM("ADMIN", "OWNER", "TENANT", "BROKER", name="user_type_enum", create_type=False),
+]
+GENDER, LOGIN_METHOD, USER_TYPE = ENUMS
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    for enum in ENUMS:
+        enum.create(bind, checkfirst=True)
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("first_name", sa.String(length=100), nullable=False),
+        sa.Column("last_name", sa.String(length=100), nullable=False),
+        sa.Column("gender", GENDER, nullable=False),
+        sa.Column("dob", sa.Date(), nullable=True),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("phone", sa.String(length=20), nullable=True),
+        sa.Column("login_method", LOGIN_METHOD, nullable=False),
+        sa.Column("hashed_password", sa.String(length=255), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("is_verified", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True, if_not_exists=True)
+    op.create_index("ix_users_phone", "users", ["phone"], unique=True, if_not_exists=True)
+    op.create_table(
+        "user_roles",
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("role", USER_TYPE, nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "role"),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "country",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("iso_code", sa.CHAR(length=2), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("iso_code"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "state",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("country_id", sa.UUID(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("code", sa.VARCHAR(length=10), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(["country_id"], ["country.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "district",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("state_id", sa.UUID(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(["state_id"], ["state.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "city",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("state_id", sa.UUID(), nullable=False),
+        sa.Column("district_id", sa.UUID(), nullable=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("lat", sa.DECIMAL(precision=9, scale=6), nullable=True),
+        sa.Column("lng", sa.DECIMAL(precision=9, scale=6), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(["district_id"], ["district.id"], ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(["state_id"], ["state.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "locality",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("city_id", sa.UUID(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("pincode", sa.VARCHAR(length=10), nullable=True),
+        sa.Column("lat", sa.DECIMAL(precision=9, scale=6), nullable=True),
+        sa.Column("lng", sa.DECIMAL(precision=9, scale=6), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(["city_id"], ["city.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ("locality", "city", "district", "state", "country", "user_roles", "users"):
+        op.drop_table(table, if_exists=True)
+    bind = op.get_bind()
+    for enum in ENUMS:
+        enum.drop(bind, checkfirst=True)
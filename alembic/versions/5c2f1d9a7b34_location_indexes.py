@@ -0,0 +1,134 @@
+"""Location lookup indexes and importer uniqueness
+
+Revision ID: 5c2f1d9a7b34
+Revises: 1a7d3e9c5b20
+Create Date: 2026-10-17 10:00:00.000000
+
+Also creates data_import (fingerprint of the last location seed import).
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2f1d9a7b34'
+down_revision: Union[str, Sequence[str], None] = '1a7d3e9c5b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# table -> (key the importer treats as unique, [(child table, fk column)])
+DEDUPE = [
+    ("state", "country_id, name", [("district", "state_id"), ("city", "state_id")]),
+    ("district", "state_id, name", [("city", "district_id")]),
+    ("city", "state_id, district_id, name", [("locality", "city_id")]),
+    ("locality", "city_id, name, pincode", []),
+]
+
+NIL_UUID = "'00000000-0000-0000-0000-000000000000'::uuid"
+
+TRGM_INDEXES = [("ix_state_name_trgm", "state"), ("ix_city_name_trgm", "city"), ("ix_locality_name_trgm", "locality")]
+
+
+def _dedupe(table: str, key: str, children) -> None:
+    """Keep one row per key (active first), re-point children at it and delete the rest."""
+    op.execute(
+        f"CREATE TEMP TABLE {table}_dups AS "
+        f"SELECT id, keep_id FROM ("
+        f"  SELECT id, first_value(id) OVER (PARTITION BY {key} ORDER BY is_active DESC, id) AS keep_id FROM {table}"
+        f") t WHERE id <> keep_id"
+    )
+    for child, fk in children:
+        op.execute(f"UPDATE {child} c SET {fk} = d.keep_id FROM {table}_dups d WHERE c.{fk} = d.id")
+    op.execute(f"DELETE FROM {table} t USING {table}_dups d WHERE t.id = d.id")
+    op.execute(f"DROP TABLE {table}_dups")
+
+
+def _has_trgm() -> bool:
+    bind = op.get_bind()
+    return bool(bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).scalar())
+
+
+def _supports_nulls_not_distinct() -> bool:
+    bind = op.get_bind()
+    return int(bind.execute(sa.text("SHOW server_version_num")).scalar()) >= 150000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fingerprint of the last location seed import (see seed_locations)
+    op.create_table(
+        "data_import",
+        sa.Column("name", sa.String(length=50), primary_key=True),
+        sa.Column("fingerprint", sa.String(length=64), nullable=False),
+        sa.Column("imported_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        if_not_exists=True,
+    )
+
+    # Parents first: merging states/districts can turn their cities into duplicates
+    for table, key, children in DEDUPE:
+        _dedupe(table, key, children)
+
+    # Keys of the importer's existence checks (bulk_insert); NULL district/pincode count as equal there too
+    op.create_index("uq_state_country_name", "state", ["country_id", "name"], unique=True, if_not_exists=True)
+    op.create_index("uq_district_state_name", "district", ["state_id", "name"], unique=True, if_not_exists=True)
+    if _supports_nulls_not_distinct():
+        city_key = ["state_id", "district_id", "name"]
+        locality_key = ["city_id", "name", "pincode"]
+        nulls = {"postgresql_nulls_not_distinct": True}
+    else:
+        # PostgreSQL < 15: same semantics by folding NULL into a sentinel value
+        city_key = ["state_id", sa.text(f"COALESCE(district_id, {NIL_UUID})"), "name"]
+        locality_key = ["city_id", "name", sa.text("COALESCE(pincode, '')")]
+        nulls = {}
+    op.create_index("uq_city_state_district_name", "city", city_key, unique=True, if_not_exists=True, **nulls)
+    op.create_index(
+        "uq_locality_city_name_pincode", "locality", locality_key, unique=True, if_not_exists=True, **nulls
+    )
+
+    # List endpoints: filter by parent, active only, ordered by name
+    op.create_index(
+        "ix_city_state_name_active",
+        "city",
+        ["state_id", "name"],
+        postgresql_where=sa.text("is_active"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_city_district_id", "city", ["district_id"], if_not_exists=True)
+    op.create_index("ix_locality_name_id", "locality", ["name", "id"], if_not_exists=True)
+    op.create_index("ix_locality_pincode", "locality", ["pincode"], if_not_exists=True)
+
+    # Substring search (name ILIKE '%q%')
+    if _has_trgm():
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name, table in TRGM_INDEXES:
+            op.create_index(
+                name,
+                table,
+                ["name"],
+                postgresql_using="gin",
+                postgresql_ops={"name": "gin_trgm_ops"},
+                if_not_exists=True,
+            )
+    else:
+        logger.warning("pg_trgm is not available on this server; skipping trigram name indexes")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table in TRGM_INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
+    op.drop_index("ix_locality_pincode", table_name="locality", if_exists=True)
+    op.drop_index("ix_locality_name_id", table_name="locality", if_exists=True)
+    op.drop_index("ix_city_district_id", table_name="city", if_exists=True)
+    op.drop_index("ix_city_state_name_active", table_name="city", if_exists=True)
+    op.drop_index("uq_locality_city_name_pincode", table_name="locality", if_exists=True)
+    op.drop_index("uq_city_state_district_name", table_name="city", if_exists=True)
+    op.drop_index("uq_district_state_name", table_name="district", if_exists=True)
+    op.drop_index("uq_state_country_name", table_name="state", if_exists=True)
+    op.drop_table("data_import", if_exists=True)
@@ -0,0 +1,57 @@
+"""PostGIS geography columns for cities and localities
+
+Revision ID: 9e41b7c2d583
+Revises: 5c2f1d9a7b34
+Create Date: 2026-10-17 14:00:00.000000
+
+Only applied when PostGIS is available on the server; POSTGIS_ENABLED must stay off otherwise.
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e41b7c2d583'
+down_revision: Union[str, Sequence[str], None] = '5c2f1d9a7b34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+TABLES = ("city", "locality")
+
+# Generated from lat/lng, so existing rows are backfilled here and every writer
+# (ORM, COPY importer) keeps it in sync without knowing about it
+GEOG_COLUMN = (
+    "geography(Point, 4326) GENERATED ALWAYS AS ("
+    "CASE WHEN lat IS NOT NULL AND lng IS NOT NULL "
+    "THEN ST_SetSRID(ST_MakePoint(lng::float8, lat::float8), 4326)::geography END"
+    ") STORED"
+)
+
+
+def _has_postgis() -> bool:
+    bind = op.get_bind()
+    return bool(bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'postgis'")).scalar())
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _has_postgis():
+        logger.warning("PostGIS is not available on this server; skipping geography columns")
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS geog {GEOG_COLUMN}")
+        op.create_index(f"ix_{table}_geog", table, ["geog"], postgresql_using="gist", if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_index(f"ix_{table}_geog", table_name=table, if_exists=True)
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS geog")
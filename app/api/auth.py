@@ -5,16 +5,18 @@ from typing import Optional
 import random
 from app.app_service import rate_limiter
 
-from app.db.session import get_async_session
+from app.db.session import get_async_session, pin_reads_to_primary
 from app.models.user import User, LoginMethod
 from app.schemas.auth import LoginSchema, SignupSchema, OTPVerifySchema, PasswordOTPChangeSchema
-from app.utils.security import verify_password, hash_password
+from app.utils.security import verify_and_update_async, hash_password_async
 from app.utils.email import send_otp_email
 from app.utils.sms import send_otp_sms
 from app.utils.response import api_response
 from app.core.redis import get_redis
 from app.core.config import settings
-from app.utils.auth import create_access_token,refresh_access_token,create_refresh_token
+from app.utils.auth import CurrentUser, get_current_user, USER_CACHE_NAMESPACE
+from app.utils.cache import bump_generation
+from app.utils.token_store import issue_tokens, rotate_refresh_token, revoke_refresh_token, revoke_all_tokens
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -105,29 +107,33 @@ async def login(request: Request,data: LoginSchema, session: AsyncSession = Depe
         q = await session.execute(select(User).filter(User.phone == data.contact))
         user = q.scalars().first()
 
-    if not user or not verify_password(data.password, user.hashed_password):
+    if not user:
+        return api_response(
+            success=False,
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message="Invalid credentials"
+        )
+    valid, new_hash = await verify_and_update_async(data.password, user.hashed_password)
+    if not valid:
         return api_response(
             success=False,
             status_code=status.HTTP_400_BAD_REQUEST,
             message="Invalid credentials"
         )
+    if new_hash:
+        # Stored under an outdated scheme or cost; upgrade it while we have the plaintext
+        user.hashed_password = new_hash
+        await session.commit()
+        await bump_generation(USER_CACHE_NAMESPACE)  # updated_at changed
     
-    # TODO: replace with your real JWT generation logic
-    access_token = create_access_token({"sub": str(user.id)})
-    refresh_token = create_refresh_token({"sub": str(user.id)})
-
     return api_response(
-        data={
-            "access_token": access_token,
-            "refresh_token": refresh_token,
-            "token_type": "bearer"
-        },
+        data=await issue_tokens(user.id),
         message="Login successful"
     )
 
 
 @rate_limiter.limit("10/hour")  # example: 10 requests per minute per IP
-@router.post("/forget-password-change")
+@router.post("/forget-password-change", dependencies=[Depends(pin_reads_to_primary)])
 async def password_change(request: Request,data: PasswordOTPChangeSchema, session: AsyncSession = Depends(get_async_session)):
     redis = await get_redis()
     otp_key = f"otp:{data.contact}"
@@ -155,15 +161,29 @@ async def password_change(request: Request,data: PasswordOTPChangeSchema, sessio
             message="User not found"
         )
 
-    user.hashed_password = hash_password(data.new_password)
+    user.hashed_password = await hash_password_async(data.new_password)
     await session.commit()
+    await bump_generation(USER_CACHE_NAMESPACE)
+    await revoke_all_tokens(user.id)
     return api_response(message="Password updated successfully")
 
 @rate_limiter.limit("25/hour")  # example: 10 requests per minute per IP
 @router.post("/refresh")
 async def refresh_token_endpoint(request: Request,refresh_token: str = Body(...)):
-    new_access_token = refresh_access_token(refresh_token)
+    # Rotation: the presented refresh token is spent and a new pair is returned
     return api_response(
-        data={"access_token": new_access_token, "token_type": "bearer"},
+        data=await rotate_refresh_token(refresh_token),
         message="Access token refreshed"
     )
+
+
+@router.post("/logout")
+async def logout(refresh_token: str = Body(...)):
+    await revoke_refresh_token(refresh_token)
+    return api_response(message="Logged out")
+
+
+@router.post("/logout-all")
+async def logout_all(current_user: CurrentUser = Depends(get_current_user)):
+    await revoke_all_tokens(current_user.id)
+    return api_response(message="Logged out from all devices")
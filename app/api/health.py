@@ -1,7 +1,28 @@
 from fastapi import APIRouter
+from app.utils.security import password_hash_metrics
+from app.db.pool import pool_status
+from app.db.session import engine, replica_engines, replica_healthy
 
 router = APIRouter()
 
 @router.get("/ping")
 async def ping():
     return {"status": "ok"}
+
+
+@router.get("/metrics/password-hash")
+async def password_hash_pool():
+    return password_hash_metrics()
+
+
+@router.get("/metrics/db-pool")
+async def db_pool():
+    return pool_status(engine)
+
+
+@router.get("/metrics/db-replicas")
+async def db_replicas():
+    return [
+        {"healthy": healthy, **pool_status(replica)}
+        for replica, healthy in zip(replica_engines, replica_healthy)
+    ]
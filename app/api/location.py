@@ -1,21 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException,Query, Body
+from fastapi import APIRouter, Depends, HTTPException,Query, Body, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, and_,func
+from sqlalchemy import select
 from typing import Optional
+import asyncio
+import csv
+import io
+import numpy as np
 from uuid import UUID
 import uuid
-from app.db.session import get_async_session
+from app.core.config import settings
+from app.db.session import get_async_session, get_read_session, read_sessionmaker, wants_primary, pin_reads_to_primary
 from app.models.location import Country, State, City, Locality,District
-from app.utils.response import api_response
-from app.utils.query_helper import apply_filters, apply_ordering, paginate,soft_delete
-import math
+from app.utils.response import api_response, to_json
+from app.utils.query_helper import ListQuery, soft_delete, encode_cursor, decode_cursor
+from app.utils.geo_index import city_geo_index, nearest_cities_postgis
+from app.utils.search_index import location_search_index
+from app.utils.location_tree import location_tree_snapshot
+from app.utils.location_saver import LOCATION_CACHE_NAMESPACE
+from app.schemas.location import ReverseGeocodeBatch
+from app.utils.cache import cached, conditional, etag_matches, bump_generation, on_invalidate
 
 router = APIRouter(prefix="/locations", tags=["Locations"])
 
+CACHE_NAMESPACE = LOCATION_CACHE_NAMESPACE
+EXPORT_BATCH_SIZE = 2000  # rows fetched per server-side cursor round trip
+
+# list endpoint statements, built once per filter/order/pagination shape
+country_list = ListQuery(Country, lambda: select(Country.id, Country.name, Country.is_active))
+state_list = ListQuery(State, lambda: select(State.id, State.name, State.is_active))
+city_list = ListQuery(
+    City,
+    lambda: select(City.id, City.name, City.is_active, City.state_id, State.name.label("state_name")).join(
+        State, City.state_id == State.id
+    ),
+)
+locality_list = ListQuery(
+    Locality, lambda: select(Locality.id, Locality.name, Locality.pincode, Locality.is_active)
+)
+
+
+def invalidate_indexes():
+    city_geo_index.invalidate()
+    location_search_index.invalidate()
+    location_tree_snapshot.invalidate()
+
+
+# every worker rebuilds its process-local indexes when any worker writes locations
+on_invalidate(CACHE_NAMESPACE, invalidate_indexes)
+
+
+async def locations_changed():
+    """Call after any location write so indexes are rebuilt and cached responses dropped in all workers."""
+    await bump_generation(CACHE_NAMESPACE)
+
+
 # ---------------------------------------
 # Country Endpoints
 # ---------------------------------------
-@router.post("/countries")
+@router.post("/countries", dependencies=[Depends(pin_reads_to_primary)])
 async def create_country(
     payload: dict = Body(...),
     session: AsyncSession = Depends(get_async_session)
@@ -30,12 +73,13 @@ async def create_country(
     country = Country(name=name, is_active=is_active)
     session.add(country)
     await session.commit()
+    await locations_changed()
     await session.refresh(country)
 
     return api_response(message="Country created", data={"id": country.id, "name": country.name})
 
 
-@router.put("/countries/{country_id}")
+@router.put("/countries/{country_id}", dependencies=[Depends(pin_reads_to_primary)])
 async def update_country(
     country_id: UUID,
     payload: dict = Body(...),
@@ -54,37 +98,42 @@ async def update_country(
         country.is_active = is_active
 
     await session.commit()
+    await locations_changed()
     return api_response(message="Country updated")
 
 
 @router.get("/countries")
+@conditional(CACHE_NAMESPACE)
+@cached(CACHE_NAMESPACE)
 async def list_countries(
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
     query: Optional[str] = Query(None),  # New param
     order_by: Optional[str] = None,
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="cursor enables keyset pagination"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: str = Query("none", pattern="^(none|exact|estimated)$", description="Total to include in cursor mode"),
     name: Optional[str] = None,
     is_active: Optional[bool] = None,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
-    session_query = select(Country.id, Country.name, Country.is_active)
     filters = {}
     if name:
         filters["name"] = name
     if is_active is not None:
         filters["is_active"] = is_active
 
-    session_query = apply_filters(session_query, Country, filters,search_query=query)
-    session_query = apply_ordering(session_query, Country, order_by)
-    session_query = paginate(session_query, page, limit)
+    if pagination == "cursor" or cursor:
+        data = await country_list.fetch_keyset_page(session, filters, query, limit, order_by, cursor, count)
+        return api_response(data=data)
 
-    result = await session.execute(session_query)
-    return api_response(data=result.mappings().all())
+    rows = await country_list.fetch_page(session, filters, query, order_by, page, limit)
+    return api_response(data=rows)
 
 # ---------------------------------------
 # State Endpoints
 # ---------------------------------------
-@router.post("/states")
+@router.post("/states", dependencies=[Depends(pin_reads_to_primary)])
 async def create_state(
     payload: dict = Body(...),
     session: AsyncSession = Depends(get_async_session)
@@ -102,23 +151,28 @@ async def create_state(
     state = State(name=name, country_id=country_id, is_active=is_active)
     session.add(state)
     await session.commit()
+    await locations_changed()
     await session.refresh(state)
 
     return api_response(message="State created", data={"id": state.id, "name": state.name})
 
 
 @router.get("/states")
+@conditional(CACHE_NAMESPACE)
+@cached(CACHE_NAMESPACE)
 async def list_states(
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
     query: Optional[str] = Query(None),  # New param
     order_by: Optional[str] = None,
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="cursor enables keyset pagination"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: str = Query("none", pattern="^(none|exact|estimated)$", description="Total to include in cursor mode"),
     country_id: Optional[UUID] = None,
     name: Optional[str] = None,
     is_active: Optional[bool] = None,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
-    session_query = select(State.id, State.name, State.is_active)
     filters = {}
     if country_id:
         filters["country_id"] = country_id
@@ -127,17 +181,17 @@ async def list_states(
     if is_active is not None:
         filters["is_active"] = is_active
 
-    session_query = apply_filters(session_query, State, filters,search_query=query)
-    session_query = apply_ordering(session_query, State, order_by)
-    session_query = paginate(session_query, page, limit)
+    if pagination == "cursor" or cursor:
+        data = await state_list.fetch_keyset_page(session, filters, query, limit, order_by, cursor, count)
+        return api_response(data=data)
 
-    result = await session.execute(session_query)
-    return api_response(data=result.mappings().all())
+    rows = await state_list.fetch_page(session, filters, query, order_by, page, limit)
+    return api_response(data=rows)
 
 # ---------------------------------------
 # City Endpoints
 # ---------------------------------------
-@router.post("/cities")
+@router.post("/cities", dependencies=[Depends(pin_reads_to_primary)])
 async def create_city(
     payload: dict = Body(...),
     session: AsyncSession = Depends(get_async_session)
@@ -155,26 +209,28 @@ async def create_city(
     city = City(name=name, state_id=state_id, is_active=is_active)
     session.add(city)
     await session.commit()
+    await locations_changed()
     await session.refresh(city)
 
     return api_response(message="City created", data={"id": city.id, "name": city.name})
 
 
 @router.get("/cities")
+@conditional(CACHE_NAMESPACE)
+@cached(CACHE_NAMESPACE)
 async def list_cities(
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
     query: Optional[str] = Query(None),  # New param
     order_by: Optional[str] = None,
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="cursor enables keyset pagination"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: str = Query("none", pattern="^(none|exact|estimated)$", description="Total to include in cursor mode"),
     state_id: Optional[UUID] = None,
     name: Optional[str] = None,
     is_active: Optional[bool] = None,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
-    session_query = (
-        select(City.id, City.name, City.is_active, City.state_id, State.name.label("state_name"))
-        .join(State, City.state_id == State.id)
-    )
     filters = {}
     if state_id:
         filters["state_id"] = state_id
@@ -183,17 +239,17 @@ async def list_cities(
     if is_active is not None:
         filters["is_active"] = is_active
 
-    session_query = apply_filters(session_query, City, filters,search_query=query)
-    session_query = apply_ordering(session_query, City, order_by)
-    session_query = paginate(session_query, page, limit)
+    if pagination == "cursor" or cursor:
+        data = await city_list.fetch_keyset_page(session, filters, query, limit, order_by, cursor, count)
+        return api_response(data=data)
 
-    result = await session.execute(session_query)
-    return api_response(data=result.mappings().all())
+    rows = await city_list.fetch_page(session, filters, query, order_by, page, limit)
+    return api_response(data=rows)
 
 # ---------------------------------------
 # Locality Endpoints
 # ---------------------------------------
-@router.post("/localities")
+@router.post("/localities", dependencies=[Depends(pin_reads_to_primary)])
 async def create_locality(
     payload: dict = Body(...),
     session: AsyncSession = Depends(get_async_session)
@@ -212,23 +268,28 @@ async def create_locality(
     locality = Locality(name=name, city_id=city_id, pincode=pincode, is_active=is_active)
     session.add(locality)
     await session.commit()
+    await locations_changed()
     await session.refresh(locality)
 
     return api_response(message="Locality created", data={"id": locality.id, "name": locality.name})
 
 
 @router.get("/localities")
+@conditional(CACHE_NAMESPACE)
+@cached(CACHE_NAMESPACE)
 async def list_localities(
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
     query: Optional[str] = Query(None),  # New param
     order_by: Optional[str] = None,
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="cursor enables keyset pagination"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: str = Query("none", pattern="^(none|exact|estimated)$", description="Total to include in cursor mode"),
     city_id: Optional[UUID] = None,
     name: Optional[str] = None,
     is_active: Optional[bool] = None,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
-    session_query = select(Locality.id, Locality.name, Locality.pincode, Locality.is_active)
     filters = {}
     if city_id:
         filters["city_id"] = city_id
@@ -237,141 +298,263 @@ async def list_localities(
     if is_active is not None:
         filters["is_active"] = is_active
 
-    session_query = apply_filters(session_query, Locality, filters,search_query=query)
-    session_query = apply_ordering(session_query, Locality, order_by)
-    session_query = paginate(session_query, page, limit)
+    if pagination == "cursor" or cursor:
+        data = await locality_list.fetch_keyset_page(session, filters, query, limit, order_by, cursor, count)
+        return api_response(data=data)
 
-    result = await session.execute(session_query)
-    return api_response(data=result.mappings().all())
+    rows = await locality_list.fetch_page(session, filters, query, order_by, page, limit)
+    return api_response(data=rows)
 
-@router.delete("/countries/{country_id}")
+@router.get("/tree")
+async def location_tree(
+    request: Request,
+    session: AsyncSession = Depends(get_async_session)
+):
+    """Full active country -> state -> district -> city hierarchy, precompressed and cached in memory."""
+    await location_tree_snapshot.ensure(session)
+    etag = location_tree_snapshot.etag
+    headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    encoding = location_tree_snapshot.pick_encoding(request.headers.get("accept-encoding", ""))
+    if encoding != "identity":
+        # an explicit Content-Encoding also makes GZipMiddleware pass the body through untouched
+        headers["Content-Encoding"] = encoding
+    return Response(
+        content=location_tree_snapshot.bodies[encoding],
+        media_type="application/json",
+        headers=headers,
+    )
+
+@router.get("/localities/export")
+async def export_localities(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    state_id: Optional[UUID] = None,
+    city_id: Optional[UUID] = None,
+    is_active: Optional[bool] = None,
+):
+    """
+    Stream every locality with its city, district and state as NDJSON or CSV.
+    Rows are read through a server-side cursor in EXPORT_BATCH_SIZE batches, so memory
+    stays flat regardless of table size.
+    """
+    export_query = (
+        select(
+            Locality.id,
+            Locality.name,
+            Locality.pincode,
+            Locality.lat,
+            Locality.lng,
+            Locality.is_active,
+            City.id.label("city_id"),
+            City.name.label("city_name"),
+            District.id.label("district_id"),
+            District.name.label("district_name"),
+            State.id.label("state_id"),
+            State.name.label("state_name"),
+        )
+        .join(City, Locality.city_id == City.id)
+        .join(State, City.state_id == State.id)
+        .outerjoin(District, City.district_id == District.id)
+        .order_by(Locality.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    if state_id:
+        export_query = export_query.where(City.state_id == state_id)
+    if city_id:
+        export_query = export_query.where(Locality.city_id == city_id)
+    if is_active is not None:
+        export_query = export_query.where(Locality.is_active == is_active)
+    columns = list(export_query.selected_columns.keys())
+    primary = wants_primary(request)
+
+    async def rows():
+        # The request's session is closed before the body is streamed, so use our own
+        async with read_sessionmaker(primary)() as session:
+            result = await session.stream(export_query)
+            if format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(columns)
+                async for batch in result.partitions():
+                    writer.writerows(batch)
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            else:
+                async for batch in result.mappings().partitions():
+                    yield b"".join(to_json(row) + b"\n" for row in batch)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="localities.{format}"'},
+    )
+
+@router.delete("/countries/{country_id}", dependencies=[Depends(pin_reads_to_primary)])
 async def delete_country(country_id: uuid.UUID,     session: AsyncSession = Depends(get_async_session)
 ):
-    return await soft_delete(session, Country, country_id)
+    result = await soft_delete(session, Country, country_id)
+    await locations_changed()
+    return result
 
-@router.delete("/states/{state_id}")
+@router.delete("/states/{state_id}", dependencies=[Depends(pin_reads_to_primary)])
 async def delete_state(state_id: uuid.UUID,     session: AsyncSession = Depends(get_async_session)
 ):
-    return await soft_delete(session, State, state_id)
+    result = await soft_delete(session, State, state_id)
+    await locations_changed()
+    return result
 
-@router.delete("/cities/{city_id}")
+@router.delete("/cities/{city_id}", dependencies=[Depends(pin_reads_to_primary)])
 async def delete_city(city_id: uuid.UUID,     session: AsyncSession = Depends(get_async_session)
 ):
-    return await soft_delete(session, City, city_id)
+    result = await soft_delete(session, City, city_id)
+    await locations_changed()
+    return result
 
-@router.delete("/localities/{locality_id}")
+@router.delete("/localities/{locality_id}", dependencies=[Depends(pin_reads_to_primary)])
 async def delete_locality(locality_id: uuid.UUID,     session: AsyncSession = Depends(get_async_session)
 ):
-    return await soft_delete(session, Locality, locality_id)
+    result = await soft_delete(session, Locality, locality_id)
+    await locations_changed()
+    return result
+
+
+async def nearest_cities(session: AsyncSession, lats, lngs, max_distance: Optional[float] = None):
+    """Nearest city per point from PostGIS when enabled, otherwise from the in-memory index."""
+    if settings.POSTGIS_ENABLED:
+        return await nearest_cities_postgis(session, lats, lngs, max_distance)
+    await city_geo_index.ensure(session)
+    # CPU-bound for large batches, so keep it off the event loop
+    matches = await asyncio.to_thread(city_geo_index.nearest_many, lats, lngs)
+    if max_distance is not None:
+        matches = [m if m is not None and m[1] <= max_distance else None for m in matches]
+    return matches
+
+
+# The in-memory index is built from this session, so it must be the primary (see get_read_session)
+geocode_session = get_read_session if settings.POSTGIS_ENABLED else get_async_session
 
 
 @router.get("/reverse-geocode")
+@conditional(CACHE_NAMESPACE)
 async def reverse_geocode(
     lat: float = Query(..., description="Latitude"),
     long: float = Query(..., description="Longitude"),
-    session: AsyncSession = Depends(get_async_session)
+    max_distance: Optional[float] = Query(None, gt=0, description="Only match cities within this many meters"),
+    session: AsyncSession = Depends(geocode_session)
 ):
-    # Calculate squared Euclidean distance to simplify
-    # (For better accuracy, you can use Haversine or PostGIS if installed)
-    distance_expr = (
-        (City.lat - lat) * (City.lat - lat) + (City.lng - long) * (City.lng - long)
-    )
-
-    query = (
-        select(City.id, City.name.label("city_name"), State.name.label("state_name"),State.id.label("state_id"),District.id.label("district_id"))
-        .join(State, City.state_id == State.id)
-        .join(District, City.district_id == District.id)
-        .where(City.is_active == True)
-        .order_by(distance_expr.asc())
-        .limit(1)
-    )
-
-    result = await session.execute(query)
-    city_row = result.first()
+    [city_row] = await nearest_cities(session, [lat], [long], max_distance)
 
     if not city_row:
         raise HTTPException(status_code=404, detail="No city found")
 
+    city, _distance = city_row
     return api_response(
         message="Nearest city found for given coordinates",
         data={
-            "city_id": city_row.id,
-            "city_name": city_row.city_name,
-            "state_name": city_row.state_name,
-            "state_id": city_row.state_id,
-            "district_id": city_row.district_id,
+            "city_id": city["city_id"],
+            "city_name": city["city_name"],
+            "state_name": city["state_name"],
+            "state_id": city["state_id"],
+            "district_id": city["district_id"],
         },
     )
 
-def haversine(lat1, lon1, lat2, lon2):
-    # Returns distance in meters between two lat/lon points
-    R = 6371000  # Earth radius in meters
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    delta_phi = math.radians(lat2 - lat1)
-    delta_lambda = math.radians(lon2 - lon1)
-    a = math.sin(delta_phi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(delta_lambda/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    return R * c
-
+@router.post("/reverse-geocode/batch")
+async def reverse_geocode_batch(
+    payload: ReverseGeocodeBatch,
+    session: AsyncSession = Depends(geocode_session)
+):
+    matches = await nearest_cities(
+        session, [p.lat for p in payload.points], [p.long for p in payload.points], payload.max_distance
+    )
 
+    results = []
+    for point, match in zip(payload.points, matches):
+        if match is None:
+            results.append({"lat": point.lat, "long": point.long, "city_id": None})
+            continue
+        city, distance = match
+        results.append(
+            {
+                "lat": point.lat,
+                "long": point.long,
+                "city_id": city["city_id"],
+                "city_name": city["city_name"],
+                "district_id": city["district_id"],
+                "district_name": city["district_name"],
+                "state_id": city["state_id"],
+                "state_name": city["state_name"],
+                "distance_meters": distance,
+            }
+        )
 
-from sqlalchemy import func
+    return api_response(
+        message="Nearest cities found for given coordinates",
+        data={"results": results},
+    )
 
 @router.get("/suggestions")
+# a response computed from a snapshot that is still being refreshed is served but neither stored nor tagged
+@conditional(CACHE_NAMESPACE, skip=lambda: location_search_index.is_stale)
+@cached(CACHE_NAMESPACE, skip=lambda: location_search_index.is_stale)
 async def location_suggestions(
     query: Optional[str] = Query(None, description="Search term for city, state, district or locality"),
     page: int = Query(1, ge=1, description="Page number, starts from 1"),
     limit: int = Query(10, ge=1, le=50, description="Number of results per page"),
     lat: Optional[float] = Query(None, description="Latitude for distance sorting"),
     long: Optional[float] = Query(None, description="Longitude for distance sorting"),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="cursor enables keyset pagination"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     session: AsyncSession = Depends(get_async_session)
 ):
-    # Base query with Locality join added
-    base_query = (
-        select(
-            Locality.id.label("locality_id"),
-            Locality.name.label("locality_name"),
-            City.id.label("city_id"),
-            City.name.label("city_name"),
-            State.id.label("state_id"),
-            State.name.label("state_name"),
-            District.id.label("district_id"),
-            District.name.label("district_name"),
-            City.lat,
-            City.lng,
-        )
-        .join(City, Locality.city_id == City.id)
-        .join(State, City.state_id == State.id)
-        .outerjoin(District, City.district_id == District.id)
-        .where(City.is_active == True,State.is_active==True,Locality.is_active==True,District.is_active==True)
-    )
-
-    if query:
-        ilike_query = f"%{query}%"
-        # Case insensitive matching using upper()
-        base_query = base_query.where(
-            or_(
-                func.upper(City.name).like(func.upper(ilike_query)),
-                func.upper(State.name).like(func.upper(ilike_query)),
-                func.upper(District.name).like(func.upper(ilike_query)),
-                func.upper(Locality.name).like(func.upper(ilike_query)),
-            )
-        )
-
-    # Count total results
-    count_query = select(func.count()).select_from(base_query.subquery())
-    total_result = await session.execute(count_query)
-    total_count = total_result.scalar_one()
-
-    offset_val = (page - 1) * limit
-    paginated_query = base_query.limit(limit).offset(offset_val)
-
-    result = await session.execute(paginated_query)
-    rows = result.all()
+    await location_search_index.ensure(session)
+    matches = location_search_index.search(query)
+    total_count = len(matches)
+    by_distance = lat is not None and long is not None
+    keyset = pagination == "cursor" or bool(cursor)
+
+    # Resume point: offset in offset mode, (distance, position) or position in cursor mode
+    offset_val = 0 if keyset else (page - 1) * limit
+    after = None
+    if cursor:
+        values = decode_cursor(cursor)
+        try:
+            if by_distance:
+                kind, dist, name, locality_id = values
+                after = (float("inf") if dist is None else float(dist), location_search_index.position_after(name, UUID(locality_id)))
+            else:
+                kind, name, locality_id = values
+                after = location_search_index.position_after(name, UUID(locality_id))
+        except (TypeError, ValueError, AttributeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if kind != ("distance" if by_distance else "name"):
+            raise HTTPException(status_code=400, detail="Cursor does not match sorting")
+
+    # One extra row in cursor mode tells whether another page exists
+    fetch = limit + 1 if keyset else limit
     suggestions = []
+    distances = []
+
+    if by_distance:
+        # Rank the full match set by distance before slicing the requested page
+        ranked, ranked_dist = location_search_index.nearest_first(matches, lat, long, offset_val + fetch, after=after)
+        for pos, dist in zip(ranked[offset_val:], ranked_dist[offset_val:]):
+            entry = location_search_index.row(pos)
+            if not np.isnan(dist):
+                entry["distance_meters"] = float(dist)
+            suggestions.append(entry)
+            distances.append(None if np.isnan(dist) else float(dist))
+    else:
+        start = offset_val if after is None else int(np.searchsorted(matches, after))
+        suggestions = [location_search_index.row(pos) for pos in matches[start : start + fetch]]
 
-    if not rows:
+    if not keyset:
         return api_response(
             message="Location suggestions fetched",
             data={
@@ -382,54 +565,21 @@ async def location_suggestions(
             },
         )
 
-    if lat is not None and long is not None:
-        rows_with_distance = []
-        for r in rows:
-            locality_id, locality_name, city_id, city_name, state_id, state_name, district_id, district_name, city_lat, city_lng = r
-            if city_lat is not None and city_lng is not None:
-                dist = haversine(lat, long, float(city_lat), float(city_lng))
-            else:
-                dist = None
-            rows_with_distance.append((r, dist))
-
-        rows_with_distance.sort(key=lambda x: x[1] if x[1] is not None else float('inf'))
-
-        for row, dist in rows_with_distance:
-            locality_id, locality_name, city_id, city_name, state_id, state_name, district_id, district_name, *_ = row
-            entry = {
-                "locality_id": locality_id,
-                "locality_name": locality_name,
-                "city_id": city_id,
-                "city_name": city_name,
-                "state_id": state_id,
-                "state_name": state_name,
-                "district_id": district_id,
-                "district_name": district_name,
-            }
-            if dist is not None:
-                entry["distance_meters"] = dist
-            suggestions.append(entry)
-    else:
-        suggestions = [
-            {
-                "locality_id": r.locality_id,
-                "locality_name": r.locality_name,
-                "city_id": r.city_id,
-                "city_name": r.city_name,
-                "state_id": r.state_id,
-                "state_name": r.state_name,
-                "district_id": r.district_id,
-                "district_name": r.district_name,
-            }
-            for r in rows
-        ]
+    next_cursor = None
+    if len(suggestions) > limit:
+        suggestions = suggestions[:limit]
+        last = suggestions[-1]
+        if by_distance:
+            next_cursor = encode_cursor(["distance", distances[limit - 1], last["locality_name"], last["locality_id"]])
+        else:
+            next_cursor = encode_cursor(["name", last["locality_name"], last["locality_id"]])
 
     return api_response(
         message="Location suggestions fetched",
         data={
             "total": total_count,
-            "page": page,
             "limit": limit,
+            "next_cursor": next_cursor,
             "suggestions": suggestions,
         },
     )
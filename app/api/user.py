@@ -4,10 +4,10 @@ from sqlalchemy.future import select
 import uuid
 from app.core.redis import get_redis
 
-from app.db.session import get_async_session
+from app.db.session import get_async_session, get_read_session, pin_reads_to_primary
 from app.models.user import User,UserRole
 from app.schemas.user import UserCreate, UserUpdate, UserOut,UserType
-from app.utils.security import hash_password
+from app.utils.security import hash_password_async
 from app.utils.response import api_response  # <-- import here
 from app.models.user import LoginMethod
 from app.app_service import rate_limiter
@@ -15,13 +15,21 @@ from app.utils.email import send_otp_email
 from app.utils.sms import send_otp_sms
 import random
 from app.core.config import settings
+from app.utils.cache import cached, conditional, bump_generation, on_invalidate
+from app.utils.auth import CurrentUser, get_current_user, current_user_cache, USER_CACHE_NAMESPACE
+from app.utils.token_store import revoke_all_tokens
 
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+CACHE_NAMESPACE = USER_CACHE_NAMESPACE
 
+# cached auth projections may carry stale roles/active flags after any user write, in every worker
+on_invalidate(CACHE_NAMESPACE, current_user_cache.clear)
 
-@router.post("/", status_code=status.HTTP_201_CREATED)
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED, dependencies=[Depends(pin_reads_to_primary)])
 async def create_user(user_in: UserCreate, session: AsyncSession = Depends(get_async_session)):
     redis = await get_redis()
     otp_key = f"rotp:{user_in.email}" if user_in.login_method=="email" else f"otp:{user_in.phone}"
@@ -57,7 +65,7 @@ async def create_user(user_in: UserCreate, session: AsyncSession = Depends(get_a
         dob=user_in.dob,
         email=user_in.email if user_in.login_method == LoginMethod.EMAIL else None,
         phone=user_in.phone if user_in.login_method == LoginMethod.PHONE else None,
-        hashed_password=hash_password(user_in.password),
+        hashed_password=await hash_password_async(user_in.password),
         login_method=user_in.login_method,
         is_active=True,
         is_verified=False,
@@ -74,8 +82,25 @@ async def create_user(user_in: UserCreate, session: AsyncSession = Depends(get_a
         status_code=status.HTTP_201_CREATED,
     )
 
+@router.get("/me")
+async def get_me(current_user: CurrentUser = Depends(get_current_user)):
+    return api_response(
+        data={
+            "id": current_user.id,
+            "first_name": current_user.first_name,
+            "last_name": current_user.last_name,
+            "email": current_user.email,
+            "phone": current_user.phone,
+            "is_verified": current_user.is_verified,
+            "roles": current_user.roles,
+        },
+        message="User fetched successfully",
+    )
+
 @router.get("/{user_id}")
-async def get_user(user_id: uuid.UUID, session: AsyncSession = Depends(get_async_session)):
+@conditional(CACHE_NAMESPACE)
+@cached(CACHE_NAMESPACE)
+async def get_user(user_id: uuid.UUID, session: AsyncSession = Depends(get_read_session)):
     user = await session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -86,7 +111,7 @@ async def get_user(user_id: uuid.UUID, session: AsyncSession = Depends(get_async
     )
 
 
-@router.put("/{user_id}")
+@router.put("/{user_id}", dependencies=[Depends(pin_reads_to_primary)])
 async def update_user(user_id: uuid.UUID, user_in: UserUpdate, session: AsyncSession = Depends(get_async_session)):
     user = await session.get(User, user_id)
     if not user:
@@ -95,12 +120,13 @@ async def update_user(user_id: uuid.UUID, user_in: UserUpdate, session: AsyncSes
     update_data = user_in.dict(exclude_unset=True)
 
     if "password" in update_data:
-        user.hashed_password = hash_password(update_data.pop("password"))
+        user.hashed_password = await hash_password_async(update_data.pop("password"))
 
     for key, value in update_data.items():
         setattr(user, key, value)
 
     await session.commit()
+    await bump_generation(CACHE_NAMESPACE)
     await session.refresh(user)
 
     return api_response(
@@ -110,7 +136,7 @@ async def update_user(user_id: uuid.UUID, user_in: UserUpdate, session: AsyncSes
 
 
 
-@router.delete("/{user_id}")
+@router.delete("/{user_id}", dependencies=[Depends(pin_reads_to_primary)])
 async def delete_user(user_id: uuid.UUID, session: AsyncSession = Depends(get_async_session)):
     user = await session.get(User, user_id)
     if not user:
@@ -119,6 +145,8 @@ async def delete_user(user_id: uuid.UUID, session: AsyncSession = Depends(get_as
     # Soft delete by setting is_active to False
     user.is_active = False
     await session.commit()
+    await bump_generation(CACHE_NAMESPACE)
+    await revoke_all_tokens(user.id)
     await session.refresh(user)
 
     return api_response(message="User deactivated successfully")
@@ -3,14 +3,24 @@ from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import health,user,auth,location
 from app.core.config import settings
-from app.utils.response import api_response  # your custom response helper
+from app.utils.response import api_response, APIResponse  # your custom response helper
 from app.app_service import rate_limiter
 from slowapi.errors import RateLimitExceeded
-from app.utils.location_saver import load_locations_from_csv
-from app.db.session import get_async_session,async_session
-import os
+from app.utils.location_saver import seed_locations
+from app.utils.geo_index import city_geo_index
+from app.utils.search_index import location_search_index
+from app.utils.location_tree import location_tree_snapshot
+from app.utils.cache import start_invalidation_listener, stop_invalidation_listener
+from app.db.session import (
+    get_async_session,
+    async_session,
+    replica_engines,
+    READ_PRIMARY_COOKIE,
+    start_replica_health_checks,
+    stop_replica_health_checks,
+)
 
-app = FastAPI(title=settings.PROJECT_NAME)
+app = FastAPI(title=settings.PROJECT_NAME, default_response_class=APIResponse)
 app.state.limiter = rate_limiter
 
 # Middleware
@@ -23,6 +33,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """After a write, pin this client's reads to the primary until replicas have caught up."""
+    response = await call_next(request)
+    # set by pin_reads_to_primary on routes that actually write, not by HTTP method
+    if replica_engines and getattr(request.state, "read_primary", False) and response.status_code < 400:
+        response.set_cookie(
+            READ_PRIMARY_COOKIE, "1", max_age=settings.READ_YOUR_WRITES_SECONDS, httponly=True, samesite="lax"
+        )
+    return response
+
+
 app.include_router(health.router)
 app.include_router(auth.router)
 app.include_router(user.router)
@@ -35,7 +57,8 @@ async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
         success=False,
         status_code=429,
         message="Too Many Requests",
-        data={}
+        data={},
+        http_status=429,
     )
 
 
@@ -52,6 +75,17 @@ async def root(request: Request):
 @app.on_event("startup")
 async def startup_event():
     async with async_session() as session:
-        get_full_path=os.path.join(os.path.curdir,"app/utils/location_mapper.csv")
-        cget_full_path=os.path.join(os.path.curdir,"app/utils/cities.csv")
-        await load_locations_from_csv(session=session, mapper_file_path=get_full_path,cities_file_path=cget_full_path)
\ No newline at end of file
+        if settings.SEED_LOCATIONS_ON_STARTUP:
+            await seed_locations(session)
+        if not settings.POSTGIS_ENABLED:
+            await city_geo_index.build(session)
+        await location_search_index.build(session)
+        await location_tree_snapshot.build(session)
+    start_invalidation_listener()
+    start_replica_health_checks()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await stop_invalidation_listener()
+    await stop_replica_health_checks()
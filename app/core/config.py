@@ -10,6 +10,39 @@ class Settings(BaseSettings):
     OTP_TOKEN_EXPIRE_MINUTES: int = Field(..., env="OTP_TOKEN_EXPIRE_MINUTES")
     REFRESH_TOKEN_EXPIRE_DAYS: int = Field(..., env="REFRESH_TOKEN_EXPIRE_DAYS")
     HASH_ALGORITHM:str = Field(..., env="REFRESH_TOKEN_EXPIRE_DAYS")
+    SEED_LOCATIONS_ON_STARTUP: bool = Field(True, env="SEED_LOCATIONS_ON_STARTUP")
+    LOCATION_IMPORT_WORKERS: int = Field(0, env="LOCATION_IMPORT_WORKERS")  # 0 = one per CPU
+    LOCATION_IMPORT_CHUNK_ROWS: int = Field(50_000, env="LOCATION_IMPORT_CHUNK_ROWS")
+    # Reverse geocoding via PostGIS KNN (needs the geog columns migration); off = in-memory index
+    POSTGIS_ENABLED: bool = Field(False, env="POSTGIS_ENABLED")
+    CACHE_ENABLED: bool = Field(True, env="CACHE_ENABLED")
+    CACHE_TTL_SECONDS: int = Field(300, env="CACHE_TTL_SECONDS")
+    CACHE_LOCAL_TTL_SECONDS: int = Field(60, env="CACHE_LOCAL_TTL_SECONDS")
+    CACHE_LOCAL_MAX_BYTES: int = Field(64 * 1024 * 1024, env="CACHE_LOCAL_MAX_BYTES")
+    PASSWORD_HASH_WORKERS: int = Field(4, env="PASSWORD_HASH_WORKERS")
+    PASSWORD_HASH_MAX_QUEUE: int = Field(64, env="PASSWORD_HASH_MAX_QUEUE")
+    PASSWORD_HASH_SCHEME: str = Field("argon2", env="PASSWORD_HASH_SCHEME")  # argon2 or bcrypt
+    PASSWORD_BCRYPT_ROUNDS: int = Field(12, env="PASSWORD_BCRYPT_ROUNDS")
+    PASSWORD_ARGON2_TIME_COST: int = Field(2, env="PASSWORD_ARGON2_TIME_COST")
+    PASSWORD_ARGON2_MEMORY_KIB: int = Field(19456, env="PASSWORD_ARGON2_MEMORY_KIB")
+    PASSWORD_ARGON2_PARALLELISM: int = Field(1, env="PASSWORD_ARGON2_PARALLELISM")
+    AUTH_CACHE_TTL_SECONDS: int = Field(30, env="AUTH_CACHE_TTL_SECONDS")
+    AUTH_CACHE_MAX_ENTRIES: int = Field(10_000, env="AUTH_CACHE_MAX_ENTRIES")
+    # Per worker process: keep workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) below Postgres max_connections
+    DB_POOL_SIZE: int = Field(10, env="DB_POOL_SIZE")
+    DB_MAX_OVERFLOW: int = Field(5, env="DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT: float = Field(10, env="DB_POOL_TIMEOUT")
+    DB_POOL_RECYCLE: int = Field(1800, env="DB_POOL_RECYCLE")
+    DB_POOL_PRE_PING: bool = Field(True, env="DB_POOL_PRE_PING")
+    DB_STATEMENT_CACHE_SIZE: int = Field(100, env="DB_STATEMENT_CACHE_SIZE")
+    DB_ECHO: bool = Field(False, env="DB_ECHO")
+    DB_SLOW_QUERY_MS: int = Field(500, env="DB_SLOW_QUERY_MS")  # 0 disables the slow query log
+    DB_SLOW_QUERY_SAMPLE_RATE: float = Field(1.0, env="DB_SLOW_QUERY_SAMPLE_RATE")
+    DATABASE_REPLICA_URLS: str = Field("", env="DATABASE_REPLICA_URLS")  # comma separated, empty = primary only
+    REPLICA_HEALTH_CHECK_SECONDS: int = Field(10, env="REPLICA_HEALTH_CHECK_SECONDS")
+    REPLICA_HEALTH_CHECK_TIMEOUT: float = Field(2, env="REPLICA_HEALTH_CHECK_TIMEOUT")
+    # How long reads stay on the primary after a client's write; should exceed replica lag
+    READ_YOUR_WRITES_SECONDS: int = Field(5, env="READ_YOUR_WRITES_SECONDS")
 
     class Config:
         env_file = ".env"
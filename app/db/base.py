@@ -8,5 +8,6 @@ def import_models():
     # This import is done once, explicitly called when needed
     from app.models.user import User 
     from app.models.location import Locality
+    from app.models.data_import import DataImport
     # add all models here
 
@@ -0,0 +1,84 @@
+import logging
+import random
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.config import settings
+
+logger = logging.getLogger("app.db.slow_query")
+
+
+def new_pool_metrics() -> dict:
+    return {
+        "checkouts": 0,
+        "overflow_events": 0,  # connections opened beyond pool_size
+        "timeouts": 0,
+        "wait_ms_total": 0.0,
+        "wait_ms_max": 0.0,
+    }
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long checkouts wait and how often overflow is used."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = new_pool_metrics()
+
+    def _do_get(self):
+        metrics = self.metrics
+        overflow_before = self._overflow
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            metrics["timeouts"] += 1
+            raise
+        waited = (time.perf_counter() - started) * 1000
+        metrics["checkouts"] += 1
+        metrics["wait_ms_total"] += waited
+        metrics["wait_ms_max"] = max(metrics["wait_ms_max"], waited)
+        if self._overflow > max(overflow_before, 0):
+            metrics["overflow_events"] += 1
+        return conn
+
+
+def pool_status(engine) -> dict:
+    """Live pool gauges plus the cumulative checkout metrics."""
+    pool = engine.pool
+    metrics = getattr(pool, "metrics", None) or new_pool_metrics()
+    checkouts = metrics["checkouts"]
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        **metrics,
+        "wait_ms_avg": metrics["wait_ms_total"] / checkouts if checkouts else 0.0,
+    }
+
+
+def install_slow_query_log(engine):
+    """
+    Log statements slower than DB_SLOW_QUERY_MS, sampled at DB_SLOW_QUERY_SAMPLE_RATE,
+    as a cheap replacement for echoing every statement.
+    """
+    threshold = settings.DB_SLOW_QUERY_MS / 1000
+    sample_rate = settings.DB_SLOW_QUERY_SAMPLE_RATE
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        if elapsed >= threshold and random.random() < sample_rate:
+            logger.warning(f"Slow query ({elapsed * 1000:.1f} ms): {statement[:2000]}")
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(context):
+        # a failed statement never reaches after_cursor_execute
+        started = context.connection.info.get("query_started") if context.connection else None
+        if started:
+            started.pop()
@@ -1,12 +1,45 @@
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from typing import AsyncGenerator
+from fastapi import Request
+import asyncio
+import itertools
+import logging
 from app.core.config import settings  # Adjust import to your settings location
+from app.db.pool import InstrumentedPool, install_slow_query_log
+
+logger = logging.getLogger(__name__)
 
 # Use DATABASE_URL from settings
 DATABASE_URL = settings.DATABASE_URL
+REPLICA_URLS = [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+# Set on responses to writes; while present, reads go to the primary (read-your-writes)
+READ_PRIMARY_COOKIE = "read_primary"
+READ_PRIMARY_HEADER = "x-read-primary"
+
+
+def engine_options(url: str) -> dict:
+    """Pool/driver settings shared by every engine created from Settings."""
+    options = {
+        "echo": settings.DB_ECHO,
+        "poolclass": InstrumentedPool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if "+asyncpg" in url:
+        # asyncpg's per-connection prepared statement LRU; set 0 behind pgbouncer in transaction mode
+        options["connect_args"] = {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    return options
+
 
 # Create async engine
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
+engine = create_async_engine(DATABASE_URL, future=True, **engine_options(DATABASE_URL))
+if settings.DB_SLOW_QUERY_MS > 0:
+    install_slow_query_log(engine)
 
 # Create async session maker
 async_session = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession  )
@@ -16,3 +49,80 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
         yield session
 
+
+# ---------------------------------------
+# Read replicas
+# ---------------------------------------
+replica_engines = [create_async_engine(url, future=True, **engine_options(url)) for url in REPLICA_URLS]
+replica_sessions = [
+    async_sessionmaker(e, expire_on_commit=False, class_=AsyncSession) for e in replica_engines
+]
+replica_healthy = [True] * len(replica_engines)
+if settings.DB_SLOW_QUERY_MS > 0:
+    for replica in replica_engines:
+        install_slow_query_log(replica)
+_replica_cycle = itertools.count()
+_health_task = None
+
+
+def read_sessionmaker(primary: bool = False):
+    """
+    Session factory for reads: the next healthy replica in round-robin order, or the
+    primary when asked for, when no replica is configured or when none is healthy.
+    """
+    if primary or not replica_sessions:
+        return async_session
+    start = next(_replica_cycle)
+    for i in range(len(replica_sessions)):
+        idx = (start + i) % len(replica_sessions)
+        if replica_healthy[idx]:
+            return replica_sessions[idx]
+    return async_session
+
+
+def wants_primary(request: Request) -> bool:
+    return bool(request.cookies.get(READ_PRIMARY_COOKIE) or request.headers.get(READ_PRIMARY_HEADER))
+
+
+def pin_reads_to_primary(request: Request):
+    """Route dependency for endpoints that write: once they succeed, read_your_writes pins the client to the primary."""
+    request.state.read_primary = True
+
+
+async def get_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only endpoints; pinned to the primary right after the client wrote."""
+    async with read_sessionmaker(wants_primary(request))() as session:
+        yield session
+
+
+async def _check_replicas():
+    while True:
+        for idx, replica in enumerate(replica_engines):
+            try:
+                async with asyncio.timeout(settings.REPLICA_HEALTH_CHECK_TIMEOUT):
+                    async with replica.connect() as conn:
+                        await conn.execute(text("SELECT 1"))
+                healthy = True
+            except Exception:
+                healthy = False
+            if healthy != replica_healthy[idx]:
+                logger.warning(f"Replica {idx} is now {'healthy' if healthy else 'unhealthy'}")
+            replica_healthy[idx] = healthy
+        await asyncio.sleep(settings.REPLICA_HEALTH_CHECK_SECONDS)
+
+
+def start_replica_health_checks():
+    global _health_task
+    if replica_engines and (_health_task is None or _health_task.done()):
+        _health_task = asyncio.create_task(_check_replicas())
+
+
+async def stop_replica_health_checks():
+    global _health_task
+    if _health_task is not None:
+        _health_task.cancel()
+        try:
+            await _health_task
+        except asyncio.CancelledError:
+            pass
+        _health_task = None
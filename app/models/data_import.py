@@ -0,0 +1,14 @@
+# app/models/data_import.py
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class DataImport(Base):
+    """Fingerprint of the source files behind the last successful seed import."""
+    __tablename__ = "data_import"
+
+    name = Column(String(50), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    imported_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,12 +1,16 @@
 # app/models/location.py
 import uuid
 from decimal import Decimal
-from sqlalchemy import Column, String, ForeignKey, DECIMAL, CHAR, VARCHAR, Boolean
+from sqlalchemy import Column, String, ForeignKey, DECIMAL, CHAR, VARCHAR, Boolean, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
 
+# Indexes whose definition depends on the server (PostgreSQL version, pg_trgm); the
+# migration decides how/whether to create them, so autogenerate leaves them alone
+SERVER_DEPENDENT = {"server_dependent": True}
+
 
 class Country(Base):
     __tablename__ = "country"
@@ -21,6 +25,16 @@ class Country(Base):
 
 class State(Base):
     __tablename__ = "state"
+    __table_args__ = (
+        Index("uq_state_country_name", "country_id", "name", unique=True),
+        Index(
+            "ix_state_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+            info=SERVER_DEPENDENT,
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     country_id = Column(UUID(as_uuid=True), ForeignKey("country.id", ondelete="CASCADE"), nullable=False)
@@ -35,6 +49,7 @@ class State(Base):
 
 class District(Base):
     __tablename__ = "district"
+    __table_args__ = (Index("uq_district_state_name", "state_id", "name", unique=True),)
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     state_id = Column(UUID(as_uuid=True), ForeignKey("state.id", ondelete="CASCADE"), nullable=False)
@@ -47,6 +62,26 @@ class District(Base):
 
 class City(Base):
     __tablename__ = "city"
+    __table_args__ = (
+        Index(
+            "uq_city_state_district_name",
+            "state_id",
+            "district_id",
+            "name",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+            info=SERVER_DEPENDENT,
+        ),
+        Index("ix_city_state_name_active", "state_id", "name", postgresql_where=text("is_active")),
+        Index("ix_city_district_id", "district_id"),
+        Index(
+            "ix_city_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+            info=SERVER_DEPENDENT,
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     state_id = Column(UUID(as_uuid=True), ForeignKey("state.id", ondelete="CASCADE"), nullable=False)
@@ -65,6 +100,26 @@ class City(Base):
 
 class Locality(Base):
     __tablename__ = "locality"
+    __table_args__ = (
+        Index(
+            "uq_locality_city_name_pincode",
+            "city_id",
+            "name",
+            "pincode",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+            info=SERVER_DEPENDENT,
+        ),
+        Index("ix_locality_name_id", "name", "id"),
+        Index("ix_locality_pincode", "pincode"),
+        Index(
+            "ix_locality_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+            info=SERVER_DEPENDENT,
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     city_id = Column(UUID(as_uuid=True), ForeignKey("city.id", ondelete="CASCADE"), nullable=False)
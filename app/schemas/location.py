@@ -0,0 +1,12 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class Coordinate(BaseModel):
+    lat: float = Field(..., ge=-90, le=90)
+    long: float = Field(..., ge=-180, le=180)
+
+
+class ReverseGeocodeBatch(BaseModel):
+    points: List[Coordinate] = Field(..., min_length=1, max_length=2000)
+    max_distance: Optional[float] = Field(None, gt=0, description="Only match cities within this many meters")
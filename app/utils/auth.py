@@ -1,8 +1,19 @@
 import jwt
+import base64
+import hmac
+import json
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
-from fastapi import HTTPException, status
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings  # your config file with secret and durations
+from app.db.session import get_async_session
+from app.models.user import User
 
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.HASH_ALGORITHM
@@ -12,7 +23,7 @@ REFRESH_TOKEN_EXPIRE_DAYS = settings.REFRESH_TOKEN_EXPIRE_DAYS    # e.g. 7
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta if expires_delta else timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire, "type": "access"})
+    to_encode.update({"exp": expire, "type": "access", "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -20,7 +31,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta if expires_delta else timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -37,7 +48,108 @@ def verify_token(token: str, token_type: str = "access") -> dict:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate token")
 
 
-def refresh_access_token(refresh_token: str) -> str:
-    payload = verify_token(refresh_token, token_type="refresh")
-    user_data = {"sub": payload.get("sub")}  # Add other data if needed
-    return create_access_token(user_data)
+# --------------------------
+# Current user
+# --------------------------
+@dataclass(frozen=True)
+class CurrentUser:
+    """The authenticated user's projection handed to endpoints."""
+    id: uuid.UUID
+    email: Optional[str]
+    phone: Optional[str]
+    first_name: str
+    last_name: str
+    is_verified: bool
+    roles: tuple
+    claims: dict
+
+
+class AuthCache:
+    """
+    Short-lived LRU of verified access tokens keyed by jti.
+
+    An entry stores the full token, so a hit requires the presented token to match it
+    byte for byte; only then are signature verification and the user lookup skipped.
+    Entries never outlive the token's exp.
+    """
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # jti -> (expires_at, token, CurrentUser)
+
+    def get(self, jti: str, token: str):
+        entry = self._entries.get(jti)
+        if entry is None:
+            return None
+        expires_at, cached_token, user = entry
+        if expires_at < time.time() or not hmac.compare_digest(cached_token, token):
+            return None
+        self._entries.move_to_end(jti)
+        return user
+
+    def set(self, jti: str, token: str, user: CurrentUser, exp: float):
+        self._entries[jti] = (min(time.time() + self.ttl, exp), token, user)
+        self._entries.move_to_end(jti)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+# cache namespace of user reads; bump it after any write to users
+USER_CACHE_NAMESPACE = "users"
+current_user_cache = AuthCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def _unverified_jti(token: str) -> Optional[str]:
+    """Read jti from the payload without verifying; only used as a cache lookup key."""
+    try:
+        payload = token.split(".")[1]
+        return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))).get("jti")
+    except (IndexError, ValueError, AttributeError):
+        return None
+
+
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    session: AsyncSession = Depends(get_async_session),
+) -> CurrentUser:
+    """Dependency resolving the bearer access token to an active user."""
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    token = credentials.credentials
+    jti = _unverified_jti(token)
+    if jti:
+        user = current_user_cache.get(jti, token)
+        if user is not None:
+            return user
+
+    claims = verify_token(token)
+    try:
+        user_id = uuid.UUID(claims.get("sub"))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate token")
+    db_user = await session.get(User, user_id)
+    if not db_user or not db_user.is_active:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
+
+    user = CurrentUser(
+        id=db_user.id,
+        email=db_user.email,
+        phone=db_user.phone,
+        first_name=db_user.first_name,
+        last_name=db_user.last_name,
+        is_verified=db_user.is_verified,
+        roles=tuple(r.role.value for r in db_user.roles),
+        claims=claims,
+    )
+    if claims.get("jti"):
+        current_user_cache.set(claims["jti"], token, user, claims["exp"])
+    return user
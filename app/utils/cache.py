@@ -0,0 +1,430 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from redis.exceptions import RedisError
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.utils.response import APIResponse
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "cache"
+INVALIDATION_CHANNEL = f"{CACHE_PREFIX}:invalidate"
+LOCK_TTL_MS = 10_000  # upper bound on one recompute holding the cross-worker lock
+LOCK_POLL_SECONDS = 0.05
+# tags this process's invalidation messages, so it doesn't apply its own bumps twice
+PROCESS_ID = secrets.token_hex(8)
+
+# key -> future of the recompute currently running in this process
+_inflight: dict[str, asyncio.Future] = {}
+
+# namespace -> (epoch, generation), trusted only while the invalidation listener is subscribed
+_generations: dict[str, tuple] = {}
+_handlers: dict[str, list] = {}
+# namespace -> monotonic time of the last invalidation seen by this process
+_invalidated_at: dict[str, float] = {}
+_listener_task = None
+_listening = False
+
+
+# --------------------------
+# In-process tier
+# --------------------------
+class LocalCache:
+    """LRU of rendered response bodies with per-entry expiry and a total byte budget."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value, nbytes)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key, value, nbytes: int, ttl: int):
+        if nbytes > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, value, nbytes)
+        self.size += nbytes
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def clear(self, prefix: str = ""):
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            self._remove(key)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[2]
+
+
+local_cache = LocalCache(settings.CACHE_LOCAL_MAX_BYTES)
+
+
+# --------------------------
+# Generations
+# --------------------------
+def generation_key(namespace: str) -> str:
+    return f"{CACHE_PREFIX}:gen:{namespace}"
+
+
+def epoch_key(namespace: str) -> str:
+    return f"{CACHE_PREFIX}:epoch:{namespace}"
+
+
+async def _read_version(redis, namespace: str) -> tuple:
+    """
+    (epoch, counter) of a namespace from Redis. The epoch is a random nonce created
+    next to the counter, so a counter reset by a Redis restart/flush never repeats
+    a version (cache key, ETag) handed out before.
+    """
+    pipe = redis.pipeline(transaction=False)
+    pipe.set(epoch_key(namespace), secrets.token_hex(4), nx=True)
+    pipe.mget(epoch_key(namespace), generation_key(namespace))
+    _, (epoch, generation) = await pipe.execute()
+    return epoch, int(generation or 0)
+
+
+async def get_generation(namespace: str) -> str:
+    """
+    Current version of a namespace as "{epoch}.{counter}". While subscribed to
+    invalidations the value is served from memory (pushed by other workers),
+    otherwise it is read from Redis.
+    """
+    version = _generations.get(namespace) if _listening else None
+    if version is None:
+        redis = await get_redis()
+        epoch, generation = await _read_version(redis, namespace)
+        if _listening:
+            current = _generations.get(namespace)
+            if current is not None and current[0] == epoch:
+                generation = max(generation, current[1])
+            _generations[namespace] = (epoch, generation)
+        version = (epoch, generation)
+    return f"{version[0]}.{version[1]}"
+
+
+async def bump_generation(namespace: str):
+    """
+    Invalidate every cached entry of a namespace in all workers; old Redis keys simply
+    age out by TTL, in-process entries and on_invalidate handlers are dropped/run via pub/sub.
+    """
+    _apply_invalidation(namespace, None)
+    try:
+        redis = await get_redis()
+        generation = await redis.incr(generation_key(namespace))
+        epoch, _ = await _read_version(redis, namespace)
+        message = {"namespace": namespace, "epoch": epoch, "generation": generation, "origin": PROCESS_ID}
+        await redis.publish(INVALIDATION_CHANNEL, json.dumps(message))
+    except RedisError:
+        logger.exception(f"Could not bump cache generation for {namespace}")
+
+
+def on_invalidate(namespace: str, handler):
+    """Register a callable run in every worker whenever namespace is invalidated."""
+    _handlers.setdefault(namespace, []).append(handler)
+
+
+def in_replication_window(namespace: str) -> bool:
+    """
+    True shortly after a write to namespace while reads go to replicas; what a lagging
+    replica returns then may predate the write and must not be stored or tagged under
+    the new generation.
+    """
+    if not settings.DATABASE_REPLICA_URLS:
+        return False
+    invalidated_at = _invalidated_at.get(namespace)
+    return invalidated_at is not None and time.monotonic() - invalidated_at < settings.READ_YOUR_WRITES_SECONDS
+
+
+def _adopt_version(namespace: str, version):
+    current = _generations.get(namespace)
+    if version is None:
+        _generations.pop(namespace, None)
+    elif current is None or current[0] != version[0] or version[1] > current[1]:
+        # a different epoch means Redis was reset; its counter restarted
+        _generations[namespace] = version
+
+
+def _apply_invalidation(namespace: str, version):
+    _invalidated_at[namespace] = time.monotonic()
+    _adopt_version(namespace, version)
+    local_cache.clear(f"{CACHE_PREFIX}:{namespace}:")
+    for handler in _handlers.get(namespace, ()):
+        try:
+            handler()
+        except Exception:
+            logger.exception(f"Invalidation handler failed for {namespace}")
+
+
+async def _listen():
+    global _listening
+    while True:
+        try:
+            redis = await get_redis()
+            # Closed on every exit, so a reconnect doesn't leak the old connection/subscription
+            async with redis.pubsub() as pubsub:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Anything may have changed while unsubscribed
+                _generations.clear()
+                local_cache.clear()
+                _listening = True
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        data = json.loads(message["data"])
+                        # messages without an epoch (older workers) just force a Redis read
+                        version = (data["epoch"], data["generation"]) if "epoch" in data else None
+                        if data.get("origin") == PROCESS_ID:
+                            # already invalidated locally by bump_generation; just record the new version
+                            _adopt_version(data["namespace"], version)
+                        else:
+                            _apply_invalidation(data["namespace"], version)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Cache invalidation listener failed, reconnecting")
+        finally:
+            _listening = False
+        await asyncio.sleep(1)
+
+
+def start_invalidation_listener():
+    global _listener_task
+    if _listener_task is None or _listener_task.done():
+        _listener_task = asyncio.create_task(_listen())
+
+
+async def stop_invalidation_listener():
+    global _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except asyncio.CancelledError:
+            pass
+        _listener_task = None
+
+
+def params_digest(name: str, params: dict) -> str:
+    normalized = json.dumps(jsonable_encoder(params), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(f"{name}:{normalized}".encode()).hexdigest()
+
+
+def make_key(namespace: str, generation: str, name: str, params: dict) -> str:
+    """Cache key from the endpoint name and its normalized query parameters."""
+    return f"{CACHE_PREFIX}:{namespace}:{generation}:{name}:{params_digest(name, params)}"
+
+
+# --------------------------
+# Read-through with single-flight
+# --------------------------
+class Uncacheable(Exception):
+    """Raised by a compute callable to hand back a response that must not be cached."""
+
+    def __init__(self, response):
+        self.response = response
+
+
+async def _compute_and_store(redis, key, ttl, compute, skip):
+    lock_key = f"{key}:lock"
+    # Only one worker recomputes a missing key; the rest wait for its result
+    while not await redis.set(lock_key, "1", nx=True, px=LOCK_TTL_MS):
+        await asyncio.sleep(LOCK_POLL_SECONDS)
+        body = await redis.get(key)
+        if body is not None:
+            return body.encode()
+    try:
+        body = await redis.get(key)
+        if body is not None:
+            return body.encode()
+        body = await compute()
+        if skip and skip():
+            return body
+        try:
+            await redis.set(key, body.decode(), ex=ttl)
+        except RedisError:
+            logger.exception("Cache write failed")
+        return body
+    finally:
+        try:
+            await redis.delete(lock_key)
+        except RedisError:
+            pass  # expires on its own after LOCK_TTL_MS
+
+
+async def read_through(key: str, ttl: int, compute, skip=None) -> bytes:
+    """
+    Return the cached body for key, computing (async callable returning bytes) and
+    storing it on a miss.
+
+    Concurrent misses in this process share one recompute, and a short Redis lock
+    keeps other workers from recomputing the same key at the same time. Redis
+    failures fall back to calling compute directly.
+    """
+    try:
+        redis = await get_redis()
+        body = await redis.get(key)
+    except RedisError:
+        logger.exception("Cache read failed")
+        return await compute()
+    if body is not None:
+        return body.encode()
+
+    future = _inflight.get(key)
+    if future is not None:
+        return await asyncio.shield(future)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        body = await _compute_and_store(redis, key, ttl, compute, skip)
+        future.set_result(body)
+        return body
+    except RedisError:
+        # Lost Redis while waiting for the lock; nothing was computed yet
+        logger.exception("Cache lock failed")
+        body = await compute()
+        future.set_result(body)
+        return body
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    finally:
+        _inflight.pop(key, None)
+        if future.done() and not future.cancelled():
+            future.exception()  # mark retrieved when nobody else was waiting
+
+
+def cached_response(body: bytes) -> Response:
+    """Serve an already rendered JSON body as is."""
+    return Response(content=body, media_type="application/json")
+
+
+def cached(namespace: str, ttl: int = None, local_ttl: int = None, exclude=("session",), skip=None):
+    """
+    Cache a GET endpoint's rendered response body in process memory and Redis, keyed on
+    its query parameters; hits are sent without any serialization.
+
+    Entries live under the namespace's current generation, so bump_generation(namespace)
+    after a write invalidates them everywhere at once. The in-process copy expires after
+    local_ttl (CACHE_LOCAL_TTL_SECONDS by default) so workers that missed an invalidation
+    converge quickly. Only 200 responses are cached, and nothing is stored within
+    in_replication_window. `skip` is an optional callable; when it returns True after a
+    recompute the response is returned but not stored.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not settings.CACHE_ENABLED:
+                return await func(*args, **kwargs)
+            params = {k: v for k, v in kwargs.items() if k not in exclude}
+            try:
+                generation = await get_generation(namespace)
+            except RedisError:
+                logger.exception("Cache generation read failed")
+                return await func(*args, **kwargs)
+            key = make_key(namespace, generation, func.__name__, params)
+
+            body = local_cache.get(key)
+            if body is not None:
+                return cached_response(body)
+
+            async def compute():
+                response = await func(*args, **kwargs)
+                if not isinstance(response, Response):
+                    response = APIResponse(response)
+                if response.status_code != 200:
+                    raise Uncacheable(response)
+                return bytes(response.body)
+
+            def skip_store():
+                return in_replication_window(namespace) or bool(skip and skip())
+
+            redis_ttl = ttl or settings.CACHE_TTL_SECONDS
+            try:
+                body = await read_through(key, redis_ttl, compute, skip_store)
+            except Uncacheable as exc:
+                return exc.response
+            if not skip_store():
+                local_cache.set(key, body, len(body), min(redis_ttl, local_ttl or settings.CACHE_LOCAL_TTL_SECONDS))
+            return cached_response(body)
+
+        return wrapper
+
+    return decorator
+
+
+# --------------------------
+# Conditional requests
+# --------------------------
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 requires for GET)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+
+
+def conditional(namespace: str, exclude=("session",), skip=None):
+    """
+    Add a strong ETag to a GET endpoint and answer a matching If-None-Match with 304.
+
+    The tag is derived from the namespace version (epoch and generation) plus the
+    endpoint's query parameters, so it is known before the handler (or any cache/DB
+    access) runs. Writes that bump_generation(namespace) change every tag of the
+    namespace. `skip` is an optional callable; when it returns True after the handler
+    ran, no ETag is sent.
+    Request/Response are injected into the endpoint signature when it lacks them.
+    """
+    def decorator(func):
+        sig = inspect.signature(func)
+        injected = [name for name in ("request", "response") if name not in sig.parameters]
+        extra = [
+            inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY, annotation=annotation)
+            for name, annotation in (("request", Request), ("response", Response))
+            if name in injected
+        ]
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = kwargs.pop("request") if "request" in injected else kwargs["request"]
+            response = kwargs.pop("response") if "response" in injected else kwargs["response"]
+            try:
+                generation = await get_generation(namespace)
+            except RedisError:
+                logger.exception("Cache generation read failed")
+                return await func(*args, **kwargs)
+
+            params = {k: v for k, v in kwargs.items() if k not in exclude and k not in ("request", "response")}
+            etag = f'"{namespace}-{generation}-{params_digest(func.__name__, params)[:20]}"'
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers={"ETag": etag})
+
+            result = await func(*args, **kwargs)
+            if not (in_replication_window(namespace) or (skip and skip())):
+                # headers of the injected response are not merged into a returned Response
+                (result if isinstance(result, Response) else response).headers["ETag"] = etag
+            return result
+
+        wrapper.__signature__ = sig.replace(parameters=[*sig.parameters.values(), *extra])
+        return wrapper
+
+    return decorator
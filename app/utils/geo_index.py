@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import numpy as np
+from scipy.spatial import cKDTree
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.location import City, State, District, Locality
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371000  # Earth radius in meters
+
+
+def to_unit_vectors(lat, lng):
+    """Convert latitude/longitude (degrees) into an (n, 3) array of points on the unit sphere."""
+    phi = np.radians(np.asarray(lat, dtype=np.float64))
+    lam = np.radians(np.asarray(lng, dtype=np.float64))
+    cos_phi = np.cos(phi)
+    return np.column_stack((cos_phi * np.cos(lam), cos_phi * np.sin(lam), np.sin(phi)))
+
+
+def haversine_np(lat1, lon1, lat2, lon2):
+    """Vectorized great-circle distance in meters; accepts scalars or numpy arrays."""
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    delta_phi = phi2 - phi1
+    delta_lambda = np.radians(np.asarray(lon2) - np.asarray(lon1))
+    a = np.sin(delta_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(delta_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class CityGeoIndex:
+    """
+    Process-local nearest-city index over active city and locality coordinates.
+
+    Every coordinate is stored as a unit vector in a KD-tree. The straight-line (chord)
+    distance between unit vectors grows with the great-circle distance, so the tree's
+    Euclidean nearest neighbour is the true great-circle nearest, without pole or
+    antimeridian special cases; the reported distance is recomputed with haversine.
+    Each locality point resolves to the city that owns it.
+    """
+
+    def __init__(self):
+        # (KD-tree, lat, lng, point -> index into cities, cities), swapped in one assignment
+        # so lookups running in a worker thread never see a half-built index
+        self._snapshot = (None, np.empty(0), np.empty(0), np.empty(0, dtype=np.int32), [])
+        self._version = 0
+        self._built_version = -1
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_stale(self) -> bool:
+        return self._built_version != self._version
+
+    def invalidate(self):
+        """Mark the index stale; it is rebuilt on the next lookup."""
+        self._version += 1
+
+    async def build(self, session: AsyncSession):
+        """Load active city/locality coordinates (same join shape as reverse_geocode) and rebuild."""
+        version = self._version
+        city_rows = (
+            await session.execute(
+                select(
+                    City.id,
+                    City.name,
+                    City.lat,
+                    City.lng,
+                    State.id.label("state_id"),
+                    State.name.label("state_name"),
+                    District.id.label("district_id"),
+                    District.name.label("district_name"),
+                )
+                .join(State, City.state_id == State.id)
+                .join(District, City.district_id == District.id)
+                .where(City.is_active == True)
+            )
+        ).all()
+
+        cities = []
+        city_pos = {}
+        lat, lng, owner = [], [], []
+        for r in city_rows:
+            city_pos[r.id] = len(cities)
+            cities.append(
+                {
+                    "city_id": r.id,
+                    "city_name": r.name,
+                    "state_name": r.state_name,
+                    "state_id": r.state_id,
+                    "district_id": r.district_id,
+                    "district_name": r.district_name,
+                }
+            )
+            if r.lat is not None and r.lng is not None:
+                lat.append(float(r.lat))
+                lng.append(float(r.lng))
+                owner.append(city_pos[r.id])
+
+        locality_rows = await session.execute(
+            select(Locality.city_id, Locality.lat, Locality.lng).where(
+                Locality.is_active == True,
+                Locality.lat.isnot(None),
+                Locality.lng.isnot(None),
+            )
+        )
+        for city_id, l_lat, l_lng in locality_rows:
+            pos = city_pos.get(city_id)
+            if pos is not None:
+                lat.append(float(l_lat))
+                lng.append(float(l_lng))
+                owner.append(pos)
+
+        coords = np.column_stack((np.asarray(lat, dtype=np.float64), np.asarray(lng, dtype=np.float64)))
+        # Many localities share their office's coordinates; duplicates only slow the tree down
+        # (any of the owners at an identical point is an equally near answer)
+        coords, first = np.unique(coords.reshape(-1, 2), axis=0, return_index=True)
+        lat, lng = coords[:, 0], coords[:, 1]
+        tree = await asyncio.to_thread(cKDTree, to_unit_vectors(lat, lng)) if len(lat) else None
+        self._snapshot = (tree, lat, lng, np.asarray(owner, dtype=np.int32)[first], cities)
+        self._built_version = version
+        logger.info(f"City geo index built with {len(cities)} cities and {len(lat)} distinct points.")
+
+    async def ensure(self, session: AsyncSession):
+        """Rebuild the index if it was invalidated since the last build."""
+        if not self.is_stale:
+            return
+        async with self._lock:
+            if self.is_stale:
+                await self.build(session)
+
+    def nearest_many(self, lats, lngs):
+        """
+        Nearest-city lookup for many points at once; CPU-bound, so call it via asyncio.to_thread.
+        Returns a list of (city payload, haversine distance in meters) aligned with the input.
+        """
+        tree, lat, lng, owner, cities = self._snapshot
+        if tree is None:
+            return [None] * len(lats)
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        _chord, best = tree.query(to_unit_vectors(lats, lngs))
+        distances = haversine_np(lats, lngs, lat[best], lng[best])
+        return [(cities[owner[i]], float(d)) for i, d in zip(best, distances)]
+
+
+city_geo_index = CityGeoIndex()
+
+
+# --------------------------
+# PostGIS
+# --------------------------
+# Same candidates as CityGeoIndex (active cities with a district, plus active localities of
+# those cities); each side is a KNN scan on its geog GiST index that stops at the first row.
+NEAREST_CITY_SQL = """
+SELECT city.id AS city_id, city.name AS city_name, state.id AS state_id, state.name AS state_name,
+       district.id AS district_id, district.name AS district_name, nearest.distance
+FROM unnest(CAST(:lats AS float8[]), CAST(:lngs AS float8[])) WITH ORDINALITY AS p(lat, lng, i)
+CROSS JOIN LATERAL (SELECT ST_SetSRID(ST_MakePoint(p.lng, p.lat), 4326)::geography AS g) q
+LEFT JOIN LATERAL (
+    SELECT owner_id, distance FROM (
+        (SELECT c.id AS owner_id, c.geog <-> q.g AS distance
+         FROM city c
+         WHERE c.is_active AND c.district_id IS NOT NULL AND c.geog IS NOT NULL {within_city}
+         ORDER BY c.geog <-> q.g LIMIT 1)
+        UNION ALL
+        (SELECT l.city_id, l.geog <-> q.g
+         FROM locality l JOIN city c ON c.id = l.city_id
+         WHERE l.is_active AND c.is_active AND c.district_id IS NOT NULL AND l.geog IS NOT NULL {within_locality}
+         ORDER BY l.geog <-> q.g LIMIT 1)
+    ) candidates
+    ORDER BY distance LIMIT 1
+) nearest ON true
+LEFT JOIN city ON city.id = nearest.owner_id
+LEFT JOIN state ON state.id = city.state_id
+LEFT JOIN district ON district.id = city.district_id
+ORDER BY p.i
+"""
+_nearest_city = text(NEAREST_CITY_SQL.format(within_city="", within_locality=""))
+_nearest_city_within = text(
+    NEAREST_CITY_SQL.format(
+        within_city="AND ST_DWithin(c.geog, q.g, :max_distance)",
+        within_locality="AND ST_DWithin(l.geog, q.g, :max_distance)",
+    )
+)
+
+
+async def nearest_cities_postgis(session: AsyncSession, lats, lngs, max_distance: float = None):
+    """
+    PostGIS counterpart of CityGeoIndex.nearest_many: one round trip for all points.
+    Points with no city (within max_distance meters, if given) map to None.
+    """
+    params = {"lats": [float(v) for v in lats], "lngs": [float(v) for v in lngs]}
+    stmt = _nearest_city
+    if max_distance is not None:
+        stmt = _nearest_city_within
+        params["max_distance"] = float(max_distance)
+    matches = []
+    for r in await session.execute(stmt, params):
+        if r.city_id is None:
+            matches.append(None)
+            continue
+        city = {
+            "city_id": r.city_id,
+            "city_name": r.city_name,
+            "state_name": r.state_name,
+            "state_id": r.state_id,
+            "district_id": r.district_id,
+            "district_name": r.district_name,
+        }
+        matches.append((city, float(r.distance)))
+    return matches
@@ -1,308 +1,464 @@
 import pandas as pd
 import uuid
 import logging
-from decimal import Decimal
-from sqlalchemy import select
+import math
+import hashlib
+import os
+import re
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import select, text, Numeric
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.location import Country, State, District, City, Locality
+from app.models.data_import import DataImport
+from app.core.config import settings
+from app.utils.cache import bump_generation
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 BATCH_SIZE = 500  # tweak based on your DB and memory
 
+DEFAULT_MAPPER_FILE = os.path.join(os.path.dirname(__file__), "location_mapper.csv")
+DEFAULT_CITIES_FILE = os.path.join(os.path.dirname(__file__), "cities.csv")
 
-async def insert_in_batches(session: AsyncSession, objects, batch_size=BATCH_SIZE):
-    """Insert objects in batches to avoid memory/transaction overload."""
-    for i in range(0, len(objects), batch_size):
-        batch = objects[i : i + batch_size]
-        session.add_all(batch)
-        await session.flush()
-        logger.info(f"Inserted batch {i // batch_size + 1} with {len(batch)} records.")
-
-
-def parse_coord_series(series, coord_type):
-    """Clean and convert coordinates in a pandas Series to Decimal with 6 decimals."""
-    def fix(v):
-        try:
-            v = float(v)
-            if abs(v) > 180:  # e.g. 81282380 -> 81.282380
-                v /= 1_000_000
-            if coord_type == "lat" and -90 <= v <= 90:
-                return Decimal(f"{v:.6f}")
-            if coord_type == "lng" and -180 <= v <= 180:
-                return Decimal(f"{v:.6f}")
-        except Exception:
-            return None
-        return None
-
-    return series.apply(fix)
-
-
-async def load_locations_from_csv(
-    cities_file_path: str, mapper_file_path: str, session: AsyncSession
-):
-    logger.info("Checking if country 'India' exists...")
-    india = await session.scalar(select(Country).where(Country.name == "INDIA"))
-    if not india:
-        logger.info("Country 'India' not found. Creating new entry...")
-        india = Country(id=uuid.uuid4(), name="INDIA", iso_code="IN")
-        session.add(india)
-        await session.flush()
-    else:
-        logger.info("Country 'India' found.")
+# Bump whenever the import logic changes in a way that should re-run it on unchanged files
+IMPORTER_VERSION = "3"
+LOCATION_IMPORT_NAME = "locations"
+SEED_LOCK_ID = 0x6C6F6361  # pg advisory lock key shared by every worker/pod
+LOCATION_CACHE_NAMESPACE = "locations"  # response cache/ETag namespace of the location API
 
-    # --- LOAD cities.csv and filter only India rows ---
-    logger.info(f"Reading cities CSV file: {cities_file_path}")
-    cities_df = pd.read_csv(cities_file_path)
+# The postal mapper CSV only covers this country
+MAPPER_COUNTRY_CODE = "IN"
+MAPPER_COUNTRY_NAME = "INDIA"
 
-    # Filter only India rows by country_name (case insensitive)
-    cities_df = cities_df[cities_df["country_name"].str.upper() == "INDIA"].copy()
-    logger.info(f"Filtered {len(cities_df)} rows for country 'India' from cities.csv")
+# " B.O", " H.O", " S.O", " BO", " HO", " SO" post office markers, stripped in one pass
+OFFICE_SUFFIX_RE = re.compile(r" (?:[BHS]\.O|[BHS]O)")
+CITY_COLUMNS = ["name", "state_name", "country_code", "country_name", "latitude", "longitude"]
+MAPPER_COLUMNS = ["statename", "district", "divisionname", "officename", "pincode", "latitude", "longitude"]
+# Only empty fields are missing; pandas' default NA strings would turn Namibia's "NA" into NaN
+CSV_NA_OPTIONS = {"keep_default_na": False, "na_values": [""]}
 
-    # Uppercase relevant columns for uniformity
-    cities_df["name"] = cities_df["name"].str.upper()
-    cities_df["state_name"] = cities_df["state_name"].str.upper()
 
-    # Parse lat/lng with your helper
-    cities_df["lat"] = parse_coord_series(cities_df["latitude"], "lat")
-    cities_df["lng"] = parse_coord_series(cities_df["longitude"], "lng")
-
-    # --- LOAD location mapper CSV ---
-    logger.info(f"Reading location mapper CSV file: {mapper_file_path}")
-    mapper_df = pd.read_csv(mapper_file_path)
+def to_float(v):
+    """Decimal/float/NaN coordinate -> float or None, as accepted by COPY."""
+    if v is None:
+        return None
+    v = float(v)
+    return None if math.isnan(v) else v
+
+
+async def copy_records(session: AsyncSession, table_name: str, columns, records):
+    """
+    Stream tuples into a table inside the session's transaction.
+    Uses asyncpg's binary COPY when available, otherwise batched multi-row INSERTs.
+    """
+    conn = await session.connection()
+    raw = await conn.get_raw_connection()
+    driver = raw.driver_connection
+    if hasattr(driver, "copy_records_to_table"):
+        await driver.copy_records_to_table(table_name, records=records, columns=list(columns))
+        return
+
+    stmt = text(
+        f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)})"
+    )
+    for i in range(0, len(records), BATCH_SIZE):
+        await session.execute(stmt, [dict(zip(columns, r)) for r in records[i : i + BATCH_SIZE]])
+
+
+async def bulk_insert(session: AsyncSession, model, columns, records, key):
+    """
+    Load records into `model`'s table through a temporary staging table.
+
+    Records are COPY'd into the staging table (numeric coordinates as plain
+    doubles, rounded to the column scale in SQL), then moved across with one
+    INSERT ... SELECT that skips rows whose `key` columns already exist.
+    Returns the number of inserted rows.
+    """
+    if not records:
+        return 0
+    table = model.__table__
+    dialect = session.bind.dialect
+    stage = f"stage_{table.name}"
+
+    col_defs = ", ".join(
+        f"{c} double precision" if isinstance(table.c[c].type, Numeric) else f"{c} {table.c[c].type.compile(dialect=dialect)}"
+        for c in columns
+    )
+    await session.execute(text(f"CREATE TEMP TABLE IF NOT EXISTS {stage} ({col_defs}) ON COMMIT DROP"))
+    await session.execute(text(f"TRUNCATE {stage}"))
+    await copy_records(session, stage, columns, records)
+
+    target_cols = list(columns)
+    select_cols = [
+        f"round(s.{c}::numeric, {table.c[c].type.scale})" if isinstance(table.c[c].type, Numeric) else f"s.{c}"
+        for c in columns
+    ]
+    if "is_active" in table.c and "is_active" not in columns:
+        # Column(default=True) is applied by the ORM only, so set it explicitly here
+        target_cols.append("is_active")
+        select_cols.append("TRUE")
+    key_list = ", ".join(f"s.{k}" for k in key)
+    # plain equality on NOT NULL columns lets the probe use the unique key index
+    match = " AND ".join(
+        f"t.{k} IS NOT DISTINCT FROM s.{k}" if table.c[k].nullable else f"t.{k} = s.{k}" for k in key
+    )
+    result = await session.execute(
+        text(
+            f"INSERT INTO {table.name} ({', '.join(target_cols)}) "
+            f"SELECT DISTINCT ON ({key_list}) {', '.join(select_cols)} FROM {stage} s "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {table.name} t WHERE {match})"
+        )
+    )
+    logger.info(f"Inserted {result.rowcount} of {len(records)} staged {table.name} records.")
+    return result.rowcount
 
-    # Rename statename to state_name before uppercasing
-    mapper_df.rename(columns={"statename": "state_name"}, inplace=True)
 
-    # Uppercase all relevant string columns for consistency
+def parse_coord_series(series, coord_type):
+    """Clean and convert coordinates in a pandas Series to floats (NaN when invalid)."""
+    if series.dtype == object:
+        series = series.astype(str).str.strip()
+    v = pd.to_numeric(series, errors="coerce")
+    v = v.where(v.abs() <= 180, v / 1_000_000)  # e.g. 81282380 -> 81.282380
+    bound = 90 if coord_type == "lat" else 180
+    return v.where(v.between(-bound, bound))
+
+
+def _prepare_mapper_chunk(chunk):
+    """
+    Clean one chunk of the mapper CSV (runs in a worker process).
+
+    Returns partial per-(city, state, district) row counts and coordinate sums,
+    which combine exactly across chunks, plus the chunk's distinct locality rows.
+    """
+    chunk = chunk.rename(columns={"statename": "state_name"})
     for col in ["state_name", "district", "divisionname", "officename"]:
-        mapper_df[col] = mapper_df[col].fillna("").astype(str).str.upper()
-
-    # Clean coordinates
-    mapper_df["lat"] = parse_coord_series(mapper_df["latitude"], "lat")
-    mapper_df["lng"] = parse_coord_series(mapper_df["longitude"], "lng")
-
-    # --- Prepare city name in mapper_df from divisionname ---
-    mapper_df["city_name"] = (
-        mapper_df["divisionname"].str.replace(" DIVISION", "", regex=False).str.strip()
-    )
-
-    # --- Create city dataframe from mapper_df unique city/state/district with lat/lng mean ---
-    mapper_city_grouped = (
-        mapper_df.groupby(["city_name", "state_name"])
+        chunk[col] = chunk[col].fillna("").astype(str).str.upper()
+    chunk["lat"] = parse_coord_series(chunk["latitude"], "lat")
+    chunk["lng"] = parse_coord_series(chunk["longitude"], "lng")
+    chunk["city_name"] = chunk["divisionname"].str.replace(" DIVISION", "", regex=False).str.strip()
+    chunk["locality_name"] = chunk["officename"].str.replace(OFFICE_SUFFIX_RE, "", regex=True).str.strip()
+
+    city_parts = (
+        chunk.groupby(["city_name", "state_name", "district"])
         .agg(
-            district_name=pd.NamedAgg(
-                column="district", aggfunc=lambda x: x.mode().iat[0] if not x.mode().empty else None
-            ),
-            lat=pd.NamedAgg(column="lat", aggfunc=lambda x: x.dropna().mean()),
-            lng=pd.NamedAgg(column="lng", aggfunc=lambda x: x.dropna().mean()),
+            rows=("district", "size"),
+            lat_sum=("lat", "sum"),
+            lat_n=("lat", "count"),
+            lng_sum=("lng", "sum"),
+            lng_n=("lng", "count"),
         )
         .reset_index()
     )
-
-    # --- Prepare city dataframe from cities.csv (no district) ---
-    cities_for_db = cities_df.rename(
-        columns={"name": "city_name", "state_name": "state_name"}
-    )[["city_name", "state_name", "lat", "lng"]].copy()
-    # No district info in cities.csv, so fill with None for district_name
-    cities_for_db["district_name"] = None
-
-    # --- Combine city dataframes ---
-    combined_cities_df = pd.concat(
-        [
-            cities_for_db,
-            mapper_city_grouped[["city_name", "state_name", "district_name", "lat", "lng"]],
-        ],
-        ignore_index=True,
+    localities = chunk[
+        ["locality_name", "city_name", "state_name", "district", "pincode", "lat", "lng"]
+    ].drop_duplicates()
+    return city_parts, localities
+
+
+def _iter_prepared_chunks(mapper_file_path, chunk_rows, workers):
+    """Yield prepared mapper chunks, fanning out to a process pool with bounded in-flight work."""
+    reader = pd.read_csv(mapper_file_path, usecols=MAPPER_COLUMNS, chunksize=chunk_rows, **CSV_NA_OPTIONS)
+    if workers <= 1:
+        for chunk in reader:
+            yield _prepare_mapper_chunk(chunk)
+        return
+
+    # spawn: the parent holds an event loop and DB connections that must not be forked
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = []
+        for chunk in reader:
+            pending.append(pool.submit(_prepare_mapper_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def prepare_mapper_frames(mapper_file_path, chunk_rows=None, workers=None):
+    """
+    Read the postal mapper CSV in chunks and reduce it to:
+    - one row per (city, state) with its most common district and mean coordinates
+    - the distinct locality rows
+    Peak memory is bounded by the chunk size plus the reduced outputs.
+    """
+    chunk_rows = chunk_rows or settings.LOCATION_IMPORT_CHUNK_ROWS
+    workers = workers or settings.LOCATION_IMPORT_WORKERS or os.cpu_count() or 1
+
+    city_parts, locality_parts = [], []
+    for city_part, localities in _iter_prepared_chunks(mapper_file_path, chunk_rows, workers):
+        city_parts.append(city_part)
+        locality_parts.append(localities)
+
+    keys = ["city_name", "state_name"]
+    districts = pd.concat(city_parts, ignore_index=True).groupby(keys + ["district"]).sum().reset_index()
+
+    # mode of district per city: highest row count, ties broken by name like Series.mode()
+    modes = (
+        districts.sort_values(keys + ["rows", "district"], ascending=[True, True, False, True])
+        .drop_duplicates(subset=keys)[keys + ["district"]]
+        .rename(columns={"district": "district_name"})
     )
+    coords = districts.groupby(keys)[["lat_sum", "lat_n", "lng_sum", "lng_n"]].sum()
+    coords["lat"] = coords["lat_sum"] / coords["lat_n"].where(coords["lat_n"] > 0)
+    coords["lng"] = coords["lng_sum"] / coords["lng_n"].where(coords["lng_n"] > 0)
+    mapper_city_grouped = modes.merge(coords[["lat", "lng"]].reset_index(), on=keys)
+
+    localities_df = pd.concat(locality_parts, ignore_index=True).drop_duplicates()
+    return mapper_city_grouped, localities_df
+
+
+def iter_country_batches(cities_file_path, chunk_rows=None):
+    """
+    Stream cities.csv in chunks and yield (country_code, country_name, cities frame)
+    per country present in each chunk. Frames carry city_name, state_name,
+    district_name (always None, cities.csv has no districts), lat and lng.
+    """
+    chunk_rows = chunk_rows or settings.LOCATION_IMPORT_CHUNK_ROWS
+    for chunk in pd.read_csv(cities_file_path, usecols=CITY_COLUMNS, chunksize=chunk_rows, **CSV_NA_OPTIONS):
+        chunk = chunk.dropna(subset=["country_code"])
+        chunk = chunk.rename(columns={"name": "city_name"})
+        chunk["country_code"] = chunk["country_code"].astype(str).str.strip().str.upper()
+        chunk["country_name"] = chunk["country_name"].fillna(chunk["country_code"]).astype(str).str.upper()
+        chunk["city_name"] = chunk["city_name"].str.upper()
+        chunk["state_name"] = chunk["state_name"].str.upper()
+        chunk["lat"] = parse_coord_series(chunk["latitude"], "lat")
+        chunk["lng"] = parse_coord_series(chunk["longitude"], "lng")
+        chunk["district_name"] = None
+        for code, rows in chunk.groupby("country_code", sort=False):
+            yield code, rows["country_name"].iat[0], rows[["city_name", "state_name", "district_name", "lat", "lng"]]
+
+
+async def get_country_context(session: AsyncSession, contexts: dict, code: str, name: str) -> dict:
+    """
+    Return the per-country import state (country id plus state/district key maps),
+    creating the country and loading its existing keys on first use.
+    """
+    ctx = contexts.get(code)
+    if ctx is not None:
+        return ctx
+
+    country = await session.scalar(select(Country).where(Country.iso_code == code))
+    if not country:
+        logger.info(f"Country '{name}' not found. Creating new entry...")
+        country = Country(id=uuid.uuid4(), name=name, iso_code=code)
+        session.add(country)
+        await session.flush()
 
-    # Drop duplicates based on city_name + state_name + district_name
-    combined_cities_df = combined_cities_df.drop_duplicates(
-        subset=["city_name", "state_name", "district_name"]
-    ).reset_index(drop=True)
-
-    # --- Process States ---
-    logger.info("Processing unique states...")
-    combined_cities_df["state_name"] = combined_cities_df["state_name"].fillna("").str.strip().str.upper()
-    states_df = combined_cities_df[["state_name"]].drop_duplicates()
-    logger.info(f"Found {len(states_df)} unique states.")
-
-    state_map = {}
-    new_states = []
-    for _, row in states_df.iterrows():
-        state_name = row.state_name
-        if not state_name:
-            continue  # skip empty
-        existing_state = await session.scalar(
-            select(State).where(State.name == state_name, State.country_id == india.id)
+    # Existing keys are loaded once per country into hash maps, so batches never query for them
+    states = {
+        name: state_id
+        for name, state_id in await session.execute(
+            select(State.name, State.id).where(State.country_id == country.id)
         )
-        if existing_state:
-            state_map[state_name] = existing_state.id
-        else:
-            state_obj = State(id=uuid.uuid4(), country_id=india.id, name=state_name)
-            new_states.append(state_obj)
-
+    }
+    state_name_by_id = {state_id: name for name, state_id in states.items()}
+    districts = {
+        (name, state_name_by_id[state_id]): district_id
+        for name, state_id, district_id in await session.execute(
+            select(District.name, District.state_id, District.id)
+            .join(State, District.state_id == State.id)
+            .where(State.country_id == country.id)
+        )
+    }
+    ctx = contexts[code] = {"country_id": country.id, "states": states, "districts": districts}
+    return ctx
+
+
+async def write_hierarchy(session: AsyncSession, ctx: dict, cities_df) -> int:
+    """
+    Write one batch of cities (city_name, state_name, district_name, lat, lng) for a
+    country, creating missing states and districts first. Rows already in the DB are
+    skipped by the staging insert. Returns the number of inserted cities.
+    """
+    cities_df = cities_df.copy()
+    cities_df["state_name"] = cities_df["state_name"].fillna("").str.strip().str.upper()
+    cities_df["district_name"] = cities_df["district_name"].fillna("").str.strip().str.upper()
+    cities_df = cities_df[(cities_df["city_name"].fillna("") != "") & (cities_df["state_name"] != "")]
+    cities_df = cities_df.drop_duplicates(subset=["city_name", "state_name", "district_name"])
+
+    # --- States ---
+    state_map = ctx["states"]
+    new_states = [
+        (uuid.uuid4(), ctx["country_id"], state_name)
+        for state_name in cities_df["state_name"].unique()
+        if state_name not in state_map
+    ]
     if new_states:
-        await insert_in_batches(session, new_states)
-        for state_obj in new_states:
-            state_map[state_obj.name] = state_obj.id
-
-    logger.info("States processed.")
+        await bulk_insert(session, State, ("id", "country_id", "name"), new_states, key=("country_id", "name"))
+        for state_id, _, state_name in new_states:
+            state_map[state_name] = state_id
 
-    # --- Process Districts ---
-    logger.info("Processing unique districts...")
-    combined_cities_df["district_name"] = combined_cities_df["district_name"].fillna("").str.strip().str.upper()
-    district_df = combined_cities_df[["district_name", "state_name"]].drop_duplicates()
-    logger.info(f"Found {len(district_df)} unique districts.")
-
-    district_map = {}
+    # --- Districts ---
+    district_map = ctx["districts"]
     new_districts = []
-    for _, row in district_df.iterrows():
-        district_name = row.district_name
-        state_name = row.state_name
-        if not district_name or not state_name:
-            continue
-        existing_district = await session.scalar(
-            select(District).where(
-                District.name == district_name,
-                District.state_id == state_map[state_name],
-            )
+    for row in cities_df[["district_name", "state_name"]].drop_duplicates().itertuples(index=False):
+        key = (row.district_name, row.state_name)
+        if row.district_name and key not in district_map:
+            district_id = uuid.uuid4()
+            new_districts.append((district_id, state_map[row.state_name], row.district_name))
+            district_map[key] = district_id
+    if new_districts:
+        await bulk_insert(session, District, ("id", "state_id", "name"), new_districts, key=("state_id", "name"))
+
+    # --- Cities ---
+    city_records = [
+        (
+            uuid.uuid4(),
+            state_map[row.state_name],
+            district_map.get((row.district_name, row.state_name)) if row.district_name else None,
+            row.city_name,
+            to_float(row.lat),
+            to_float(row.lng),
         )
-        if existing_district:
-            district_map[(district_name, state_name)] = existing_district.id
-        else:
-            district_obj = District(
-                id=uuid.uuid4(),
-                state_id=state_map[state_name],
-                name=district_name,
-            )
-            new_districts.append(district_obj)
+        for row in cities_df.itertuples(index=False)
+    ]
+    return await bulk_insert(
+        session,
+        City,
+        ("id", "state_id", "district_id", "name", "lat", "lng"),
+        city_records,
+        key=("state_id", "district_id", "name"),
+    )
 
-    if new_districts:
-        await insert_in_batches(session, new_districts)
-        for district_obj in new_districts:
-            state_name_for_district = next(
-                (k for k, v in state_map.items() if v == district_obj.state_id), None
-            )
-            if state_name_for_district:
-                district_map[(district_obj.name, state_name_for_district)] = district_obj.id
 
-    logger.info("Districts processed.")
+async def write_localities(session: AsyncSession, ctx: dict, localities_df, batch_rows=None) -> int:
+    """Insert mapper localities for one country in bounded batches; returns the inserted count."""
+    batch_rows = batch_rows or settings.LOCATION_IMPORT_CHUNK_ROWS
+    state_name_by_id = {state_id: name for name, state_id in ctx["states"].items()}
+    district_name_by_id = {district_id: key[0] for key, district_id in ctx["districts"].items()}
 
-    # --- Process Cities with lat/lng cache ---
-    logger.info("Processing cities...")
+    # City keys are read back once, after every city of the country has been written
     city_map = {}
-    new_cities = []
-    existing_city_coords_cache = {}
-
-    for _, row in combined_cities_df.iterrows():
-        city_name = row.city_name
-        state_name = row.state_name
-        district_name = row.district_name if pd.notnull(row.district_name) and row.district_name != "" else None
-
-        if not city_name or not state_name:
-            continue
-
-        district_id = None
-        if district_name:
-            district_id = district_map.get((district_name, state_name))
-
-        lat = row.lat
-        lng = row.lng
-
-        existing_city = await session.scalar(
-            select(City).where(
-                City.name == city_name,
-                City.state_id == state_map[state_name],
-                City.district_id == district_id,
-            )
-        )
-        if existing_city:
-            city_map[(city_name, state_name, district_name)] = existing_city.id
-            existing_city_coords_cache[(city_name, state_name, district_name)] = (existing_city.lat, existing_city.lng)
-        else:
-            # Fallback lat/lng from cache if missing
-            if (lat is None or lng is None) and (city_name, state_name, district_name) in existing_city_coords_cache:
-                lat, lng = existing_city_coords_cache[(city_name, state_name, district_name)]
-
-            city_obj = City(
-                id=uuid.uuid4(),
-                state_id=state_map[state_name],
-                district_id=district_id,
-                name=city_name,
-                lat=Decimal(f"{lat:.6f}") if lat is not None else None,
-                lng=Decimal(f"{lng:.6f}") if lng is not None else None,
-            )
-            new_cities.append(city_obj)
+    city_coords = {}
+    existing_cities = await session.execute(
+        select(City.name, City.state_id, City.district_id, City.id, City.lat, City.lng)
+        .join(State, City.state_id == State.id)
+        .where(State.country_id == ctx["country_id"])
+    )
+    for name, state_id, district_id, city_id, lat, lng in existing_cities:
+        key = (name, state_name_by_id[state_id], district_name_by_id.get(district_id))
+        city_map[key] = city_id
+        city_coords[key] = (lat, lng)
 
-    if new_cities:
-        await insert_in_batches(session, new_cities)
-        for city_obj in new_cities:
-            state_name_for_city = next(
-                (k for k, v in state_map.items() if v == city_obj.state_id), None
-            )
-            district_name_for_city = next(
-                (k[0] for k, v in district_map.items() if v == city_obj.district_id), None
+    localities_df = localities_df.rename(columns={"district": "district_name"})
+    localities_df["pincode"] = localities_df["pincode"].astype(str).str.strip()
+    localities_df = localities_df.drop_duplicates()
+
+    inserted = 0
+    for start in range(0, len(localities_df), batch_rows):
+        locality_records = []
+        for row in localities_df.iloc[start : start + batch_rows].itertuples(index=False):
+            city_key = (row.city_name, row.state_name, row.district_name or None)
+            city_id = city_map.get(city_key)
+            if not city_id:
+                logger.warning(f"City not found for locality {row.locality_name}, skipping.")
+                continue
+
+            lat = to_float(row.lat)
+            lng = to_float(row.lng)
+            # Fallback lat/lng from the city coords if missing in locality
+            if (lat is None or lng is None) and city_key in city_coords:
+                lat, lng = city_coords[city_key]
+
+            locality_records.append(
+                (uuid.uuid4(), city_id, row.locality_name, row.pincode, to_float(lat), to_float(lng))
             )
-            if state_name_for_city:
-                city_map[(city_obj.name, state_name_for_city, district_name_for_city)] = city_obj.id
-                existing_city_coords_cache[(city_obj.name, state_name_for_city, district_name_for_city)] = (city_obj.lat, city_obj.lng)
 
-    logger.info("Cities processed.")
+        # The staging insert skips localities already loaded
+        inserted += await bulk_insert(
+            session,
+            Locality,
+            ("id", "city_id", "name", "pincode", "lat", "lng"),
+            locality_records,
+            key=("city_id", "name", "pincode"),
+        )
+    return inserted
 
-    # --- Process Localities from mapper_df ---
-    logger.info("Processing localities...")
-    mapper_df["locality_name"] = (
-        mapper_df["officename"]
-        .str.replace(" B.O", "", regex=False)
-        .str.replace(" H.O", "", regex=False)
-        .str.replace(" S.O", "", regex=False)
-        .str.replace(" BO", "", regex=False)
-        .str.replace(" HO", "", regex=False)
-        .str.replace(" SO", "", regex=False)
-        .str.strip()
-        .str.upper()
-    )
 
-    localities_df = mapper_df[
-        ["locality_name", "city_name", "state_name", "district", "pincode", "lat", "lng"]
-    ].copy()
+async def load_locations_from_csv(
+    cities_file_path: str, mapper_file_path: str, session: AsyncSession
+):
+    """
+    Import every country in cities.csv plus the postal mapper's districts and localities.
 
-    localities_df.rename(
-        columns={"district": "district_name"}, inplace=True
-    )
-    localities_df["pincode"] = localities_df["pincode"].astype(str).str.strip()
+    cities.csv is streamed in chunks and each country's slice of a chunk is written
+    as it arrives, so memory stays bounded by the chunk size and the per-country
+    state/district key maps, whatever the size of the dataset.
+    """
+    contexts = {}
 
-    locality_objs = []
-    for _, row in localities_df.drop_duplicates().iterrows():
-        city_key = (row.city_name, row.state_name, row.district_name)
-        city_id = city_map.get(city_key)
-        if not city_id:
-            logger.warning(f"City not found for locality {row.locality_name}, skipping.")
-            continue
-
-        lat = row.lat
-        lng = row.lng
-        # Fallback lat/lng from cached city coords if missing in locality
-        if (lat is None or lng is None) and city_key in existing_city_coords_cache:
-            lat, lng = existing_city_coords_cache[city_key]
-
-        locality_objs.append(
-            Locality(
-                id=uuid.uuid4(),
-                city_id=city_id,
-                name=row.locality_name,
-                pincode=row.pincode,
-                lat=Decimal(f"{lat:.6f}") if lat is not None else None,
-                lng=Decimal(f"{lng:.6f}") if lng is not None else None,
-            )
-        )
+    # --- Stream cities.csv, one batch per country per chunk ---
+    logger.info(f"Reading cities CSV file: {cities_file_path}")
+    batches = iter_country_batches(cities_file_path)
+    while True:
+        # pandas parsing is blocking; pull each batch off the event loop
+        batch = await asyncio.to_thread(next, batches, None)
+        if batch is None:
+            break
+        code, name, cities_df = batch
+        ctx = await get_country_context(session, contexts, code, name)
+        inserted = await write_hierarchy(session, ctx, cities_df)
+        logger.info(f"Country {code}: inserted {inserted} of {len(cities_df)} cities in batch.")
+
+    # --- LOAD location mapper CSV (chunked, cleaned and aggregated in worker processes) ---
+    logger.info(f"Reading location mapper CSV file: {mapper_file_path}")
+    mapper_city_grouped, localities_df = await asyncio.to_thread(prepare_mapper_frames, mapper_file_path)
+    ctx = await get_country_context(session, contexts, MAPPER_COUNTRY_CODE, MAPPER_COUNTRY_NAME)
+    inserted = await write_hierarchy(session, ctx, mapper_city_grouped)
+    logger.info(f"Country {MAPPER_COUNTRY_CODE}: inserted {inserted} mapper cities.")
 
-    if locality_objs:
-        await insert_in_batches(session, locality_objs)
-    logger.info(f"Inserted {len(locality_objs)} localities.")
+    logger.info("Processing localities...")
+    inserted = await write_localities(session, ctx, localities_df)
+    logger.info(f"Inserted {inserted} localities.")
 
     await session.commit()
     logger.info("All data committed successfully.")
     return "Ok"
+
+
+def fingerprint_files(*paths) -> str:
+    """sha256 over the importer version and the raw bytes of every source file."""
+    digest = hashlib.sha256(IMPORTER_VERSION.encode())
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def seed_locations(
+    session: AsyncSession,
+    cities_file_path: str = DEFAULT_CITIES_FILE,
+    mapper_file_path: str = DEFAULT_MAPPER_FILE,
+    force: bool = False,
+) -> bool:
+    """
+    Import the location CSVs only when their fingerprint differs from the last import.
+
+    Concurrent workers serialize on a transaction-scoped advisory lock and re-check
+    the fingerprint once they hold it, so a deploy imports at most once. The
+    fingerprint row is written in the same transaction as the import itself.
+    Needs the migrations applied (data_import). Returns True when an import ran.
+    """
+    await session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SEED_LOCK_ID})
+
+    fingerprint = fingerprint_files(cities_file_path, mapper_file_path)
+    record = await session.get(DataImport, LOCATION_IMPORT_NAME)
+    if record and record.fingerprint == fingerprint and not force:
+        logger.info("Location CSVs unchanged since last import, skipping.")
+        await session.commit()
+        return False
+
+    if record:
+        record.fingerprint = fingerprint
+    else:
+        session.add(DataImport(name=LOCATION_IMPORT_NAME, fingerprint=fingerprint))
+    await load_locations_from_csv(
+        cities_file_path=cities_file_path, mapper_file_path=mapper_file_path, session=session
+    )
+    # cached responses, ETags and in-memory indexes of every worker predate the import
+    await bump_generation(LOCATION_CACHE_NAMESPACE)
+    return True
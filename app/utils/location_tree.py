@@ -0,0 +1,138 @@
+import asyncio
+import gzip
+import hashlib
+import logging
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.location import Country, State, District, City
+from app.utils.response import api_response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+class LocationTreeSnapshot:
+    """
+    The whole active country -> state -> district -> city hierarchy, serialized and
+    compressed once per change and served straight from memory.
+
+    The ETag is a hash of the serialized body, so every worker that built the same
+    data hands out the same tag.
+    """
+
+    def __init__(self):
+        self.etag = None
+        self.bodies = {}  # content-encoding ("identity", "gzip", "br") -> bytes
+        self._version = 0
+        self._built_version = -1
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_stale(self) -> bool:
+        return self._built_version != self._version
+
+    def invalidate(self):
+        """Mark the snapshot stale; it is rebuilt on the next request."""
+        self._version += 1
+
+    async def build(self, session: AsyncSession):
+        version = self._version
+        countries = (
+            await session.execute(
+                select(Country.id, Country.name, Country.iso_code)
+                .where(Country.is_active == True)
+                .order_by(Country.name)
+            )
+        ).all()
+        states = (
+            await session.execute(
+                select(State.id, State.name, State.country_id).where(State.is_active == True).order_by(State.name)
+            )
+        ).all()
+        districts = (
+            await session.execute(
+                select(District.id, District.name, District.state_id)
+                .where(District.is_active == True)
+                .order_by(District.name)
+            )
+        ).all()
+        cities = (
+            await session.execute(
+                select(City.id, City.name, City.state_id, City.district_id)
+                .where(City.is_active == True)
+                .order_by(City.name)
+            )
+        ).all()
+
+        tree = []
+        state_nodes = {}
+        country_nodes = {}
+        for c in countries:
+            node = {"id": c.id, "name": c.name, "iso_code": c.iso_code, "states": []}
+            country_nodes[c.id] = node
+            tree.append(node)
+        for s in states:
+            country = country_nodes.get(s.country_id)
+            if country is not None:
+                # cities without a district (e.g. from cities.csv) hang directly off the state
+                node = state_nodes[s.id] = {"id": s.id, "name": s.name, "districts": [], "cities": []}
+                country["states"].append(node)
+        district_nodes = {}
+        for d in districts:
+            state = state_nodes.get(d.state_id)
+            if state is not None:
+                node = district_nodes[d.id] = {"id": d.id, "name": d.name, "cities": []}
+                state["districts"].append(node)
+        for c in cities:
+            city = {"id": c.id, "name": c.name}
+            if c.district_id is not None:
+                parent = district_nodes.get(c.district_id)
+            else:
+                parent = state_nodes.get(c.state_id)
+            if parent is not None:
+                parent["cities"].append(city)
+
+        body = bytes(api_response(message="Location tree fetched", data={"countries": tree}).body)
+        # Compression (brotli especially) is CPU-bound; keep it off the event loop
+        self.bodies = await asyncio.to_thread(self._encode, body)
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self._built_version = version
+        logger.info(
+            f"Location tree snapshot built: {len(body)} bytes, "
+            + ", ".join(f"{k} {len(v)}" for k, v in self.bodies.items() if k != "identity")
+        )
+
+    @staticmethod
+    def _encode(body: bytes) -> dict:
+        bodies = {"identity": body, "gzip": gzip.compress(body, compresslevel=9)}
+        if brotli is not None:
+            bodies["br"] = brotli.compress(body, quality=11)
+        return bodies
+
+    async def ensure(self, session: AsyncSession):
+        """Rebuild the snapshot if it was invalidated since the last build."""
+        if not self.is_stale:
+            return
+        async with self._lock:
+            if self.is_stale:
+                await self.build(session)
+
+    def pick_encoding(self, accept_encoding: str) -> str:
+        """Best available encoding the client accepts (q=0 excludes)."""
+        accepted = set()
+        for part in accept_encoding.lower().split(","):
+            name, _, params = part.strip().partition(";")
+            if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                continue
+            accepted.add(name.strip())
+        for encoding in ("br", "gzip"):
+            if encoding in self.bodies and (encoding in accepted or "*" in accepted):
+                return encoding
+        return "identity"
+
+
+location_tree_snapshot = LocationTreeSnapshot()
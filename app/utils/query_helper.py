@@ -8,7 +8,9 @@ import uuid
 # Utility: Safe Filters & Ordering
 # --------------------------
 from typing import Optional
-from sqlalchemy import or_
+from sqlalchemy import or_, func, tuple_, bindparam, Uuid
+import base64
+import json
 
 def apply_filters(query, model, filters: dict, search_query: Optional[str] = None):
     """Apply validated filters from query params, plus optional partial name search."""
@@ -27,24 +29,229 @@ def apply_filters(query, model, filters: dict, search_query: Optional[str] = Non
     return query
 
 
-def apply_ordering(query, model, order_by: str):
-    """Apply safe ordering."""
-    if not order_by:
-        return query
+def encode_cursor(values: list) -> str:
+    """Pack keyset values into an opaque, URL-safe cursor token."""
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """Unpack a cursor produced by encode_cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def _coerce(col, value):
+    """Convert a JSON cursor value back to the column's python type for binding."""
+    if value is None:
+        return None
+    if isinstance(col.type, Uuid):
+        return uuid.UUID(value)
+    python_type = col.type.python_type
+    return value if isinstance(value, python_type) else python_type(value)
+
+
+def _resolve_order(model, order_by: Optional[str], keyset: bool):
+    """Split order_by into (direction, field, column); keyset mode falls back to id."""
     direction = "asc"
-    if order_by.startswith("-"):
+    if order_by and order_by.startswith("-"):
         direction = "desc"
         order_by = order_by[1:]
-    if hasattr(model, order_by):
-        col = getattr(model, order_by)
-        query = query.order_by(col.desc() if direction == "desc" else col.asc())
-    return query
+    col = getattr(model, order_by) if order_by and hasattr(model, order_by) else None
+    if keyset and col is None:
+        order_by, col = "id", model.id
+    return direction, order_by, col
+
+
+def _check_keyset(order_by: str, col):
+    if col.nullable:
+        raise HTTPException(status_code=400, detail=f"Cannot use cursor pagination with order_by '{order_by}'")
+
+
+def _cursor_after(model, cursor: str, direction: str, order_by: str, col) -> tuple:
+    """Decode a cursor into the (sort key, id) values to resume after."""
+    values = decode_cursor(cursor)
+    if len(values) != 3 or values[0] != f"{direction}:{order_by}":
+        raise HTTPException(status_code=400, detail="Cursor does not match order_by")
+    try:
+        return _coerce(col, values[1]), _coerce(model.id, values[2])
+    except (TypeError, ValueError, AttributeError):  # uuid.UUID raises AttributeError for non-strings
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def apply_ordering(query, model, order_by: str, keyset: bool = False, after: Optional[tuple] = None):
+    """
+    Apply safe ordering.
+
+    In keyset mode `id` is appended as a tie-breaker, the sort key is selected as
+    `_cursor_key`/`_cursor_id` for building the next cursor, and only rows after
+    `after` (the (sort key, id) pair, as values or bind parameters) are returned,
+    so every page costs the same regardless of depth.
+    """
+    direction, order_by, col = _resolve_order(model, order_by, keyset)
+    if not keyset:
+        if col is not None:
+            query = query.order_by(col.desc() if direction == "desc" else col.asc())
+        return query
+
+    _check_keyset(order_by, col)
+    if after is not None:
+        key = tuple_(col, model.id)
+        query = query.where(key < tuple_(*after) if direction == "desc" else key > tuple_(*after))
+
+    if direction == "desc":
+        query = query.order_by(col.desc(), model.id.desc())
+    else:
+        query = query.order_by(col.asc(), model.id.asc())
+    return query.add_columns(col.label("_cursor_key"), model.id.label("_cursor_id"))
+
 
 def paginate(query, page: int, limit: int):
     """Apply pagination."""
     offset = (page - 1) * limit
     return query.offset(offset).limit(limit)
 
+
+def keyset_page(rows, limit: int, model, order_by: Optional[str] = None):
+    """Split keyset-mode rows (fetched with limit + 1) into items and the next cursor."""
+    direction, field, _ = _resolve_order(model, order_by, keyset=True)
+    items = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor([f"{direction}:{field}", last["_cursor_key"], last["_cursor_id"]])
+    for item in items:
+        item.pop("_cursor_key", None)
+        item.pop("_cursor_id", None)
+    return items, next_cursor
+
+
+async def count_rows(session: AsyncSession, query, mode: str = "exact") -> Optional[int]:
+    """
+    Total number of rows matched by an unpaginated query.
+    mode is "exact" (count(*)), "estimated" (planner row estimate, constant cost) or "none".
+    """
+    if mode == "none":
+        return None
+    query = query.order_by(None)
+    if mode == "estimated":
+        sql = query.compile(dialect=session.bind.dialect, compile_kwargs={"literal_binds": True})
+        conn = await session.connection()
+        plan = (await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    return await session.scalar(select(func.count()).select_from(query.subquery()))
+
+# --------------------------
+# Cached statement shapes
+# --------------------------
+class ListQuery:
+    """
+    apply_filters/apply_ordering/paginate for one list endpoint, with the resulting
+    statements built once per shape and reused.
+
+    A shape is (filter fields, name search on/off, order field and direction,
+    offset/keyset mode, cursor present); its statement is assembled with bind
+    parameters on first use, so later requests only bind values. Reusing the same
+    statement object also lets SQLAlchemy skip rebuilding its compiled-cache key.
+    `base` is a callable returning the select to filter, called once per shape.
+    """
+
+    def __init__(self, model, base):
+        self.model = model
+        self.base = base
+        self._shapes = {}
+
+    def _shape(self, key: tuple, build):
+        stmt = self._shapes.get(key)
+        if stmt is None:
+            stmt = self._shapes[key] = build()
+        return stmt
+
+    def _bind_filters(self, filters: dict, search_query: Optional[str]):
+        """Valid filter fields (in a stable order), whether name search applies, and bind values."""
+        fields = tuple(sorted(field for field in filters if hasattr(self.model, field)))
+        params = {f"f_{field}": filters[field] for field in fields}
+        search = bool(search_query) and hasattr(self.model, "name")
+        if search:
+            params["search"] = f"%{search_query}%"
+        return fields, search, params
+
+    def _filtered(self, fields: tuple, search: bool):
+        def build():
+            query = self.base()
+            for field in fields:
+                query = query.where(getattr(self.model, field) == bindparam(f"f_{field}"))
+            if search:
+                query = query.where(self.model.name.ilike(bindparam("search")))
+            return query
+
+        return self._shape(("filtered", fields, search), build)
+
+    async def _total(self, session: AsyncSession, fields: tuple, search: bool, params: dict, mode: str):
+        if mode == "none":
+            return None
+        filtered = self._filtered(fields, search)
+        if mode == "estimated":
+            return await count_rows(session, filtered.params(params), mode)
+        stmt = self._shape(("count", fields, search), lambda: select(func.count()).select_from(filtered.subquery()))
+        return await session.scalar(stmt, params)
+
+    async def fetch_page(
+        self, session: AsyncSession, filters: dict, search_query: Optional[str], order_by: Optional[str], page: int, limit: int
+    ):
+        """Offset mode: one page of rows as mappings."""
+        fields, search, params = self._bind_filters(filters, search_query)
+        direction, field, col = _resolve_order(self.model, order_by, keyset=False)
+
+        def build():
+            query = apply_ordering(self._filtered(fields, search), self.model, order_by)
+            return query.offset(bindparam("offset")).limit(bindparam("limit"))
+
+        stmt = self._shape(("offset", fields, search, direction, field if col is not None else None), build)
+        params.update(offset=(page - 1) * limit, limit=limit)
+        return (await session.execute(stmt, params)).mappings().all()
+
+    async def fetch_keyset_page(
+        self,
+        session: AsyncSession,
+        filters: dict,
+        search_query: Optional[str],
+        limit: int,
+        order_by: Optional[str],
+        cursor: Optional[str],
+        count: str = "none",
+    ) -> dict:
+        """Cursor mode: the {items, next_cursor, total} payload (see apply_ordering)."""
+        model = self.model
+        fields, search, params = self._bind_filters(filters, search_query)
+        direction, field, col = _resolve_order(model, order_by, keyset=True)
+        _check_keyset(field, col)
+        total = await self._total(session, fields, search, params, count)
+        if cursor:
+            params["after_key"], params["after_id"] = _cursor_after(model, cursor, direction, field, col)
+
+        def build():
+            after = None
+            if cursor:
+                after = (bindparam("after_key", type_=col.type), bindparam("after_id", type_=model.id.type))
+            query = apply_ordering(self._filtered(fields, search), model, order_by, keyset=True, after=after)
+            return query.limit(bindparam("limit"))
+
+        stmt = self._shape(("keyset", fields, search, direction, field, bool(cursor)), build)
+        params["limit"] = limit + 1
+        result = await session.execute(stmt, params)
+        items, next_cursor = keyset_page(result.mappings().all(), limit, model, order_by)
+        return {"items": items, "next_cursor": next_cursor, "total": total}
+
+
 async def soft_delete(
     session: AsyncSession, model: Type, obj_id: uuid.UUID
 ):
@@ -1,4 +1,33 @@
+from collections.abc import Mapping
+from decimal import Decimal
 from typing import Any, Optional
+from uuid import UUID
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(obj):
+    """Types orjson does not encode natively, mirrored on fastapi's jsonable_encoder output."""
+    if isinstance(obj, UUID):  # subclasses such as asyncpg's UUID are not handled natively
+        return str(obj)
+    if isinstance(obj, Decimal):
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, Mapping):  # e.g. SQLAlchemy RowMapping
+        return dict(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def to_json(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+class APIResponse(JSONResponse):
+    """JSON response rendered by orjson; UUID, datetime, enum and numpy values are encoded natively."""
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
 
 
 def api_response(
@@ -7,10 +36,21 @@ def api_response(
     status_code: int = 200,
     message: str = "",
     data: Optional[Any] = None,
-) -> dict:
-    return {
-        "success": success,
-        "statusCode": status_code,
-        "message": message,
-        "data": data or {},
-    }
+    http_status: Optional[int] = None,
+) -> APIResponse:
+    """
+    Build the standard envelope and serialize it straight away, skipping jsonable_encoder.
+    The HTTP status is status_code for successes and 200 for failures (clients read
+    statusCode), unless http_status is given.
+    """
+    if http_status is None:
+        http_status = status_code if success else 200
+    return APIResponse(
+        {
+            "success": success,
+            "statusCode": status_code,
+            "message": message,
+            "data": data or {},
+        },
+        status_code=http_status,
+    )
@@ -0,0 +1,250 @@
+import asyncio
+import bisect
+import logging
+from collections import defaultdict
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.location import State, City, Locality, District
+from app.db.session import async_session
+from app.utils.geo_index import haversine_np
+
+logger = logging.getLogger(__name__)
+
+MAX_GRAM = 3  # n-grams of length 1..MAX_GRAM are indexed per unique name
+
+
+class NameIndex:
+    """Substring index over a list of unique upper-cased names."""
+
+    def __init__(self, names):
+        self.names = names
+        postings = defaultdict(list)
+        for name_id, name in enumerate(names):
+            grams = set()
+            for n in range(1, MAX_GRAM + 1):
+                for i in range(len(name) - n + 1):
+                    grams.add(name[i : i + n])
+            for gram in grams:
+                postings[gram].append(name_id)
+        self.postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def match(self, term: str) -> np.ndarray:
+        """Return ids of names containing term (term must already be upper-cased)."""
+        if len(term) <= MAX_GRAM:
+            return self.postings.get(term, np.empty(0, dtype=np.int32))
+
+        grams = {term[i : i + MAX_GRAM] for i in range(len(term) - MAX_GRAM + 1)}
+        lists = []
+        for gram in grams:
+            ids = self.postings.get(gram)
+            if ids is None:
+                return np.empty(0, dtype=np.int32)
+            lists.append(ids)
+        lists.sort(key=len)
+        candidates = lists[0]
+        for ids in lists[1:]:
+            candidates = np.intersect1d(candidates, ids, assume_unique=True)
+            if not len(candidates):
+                break
+        names = self.names
+        return np.asarray([i for i in candidates if term in names[i]], dtype=np.int32)
+
+
+class LocationSearchIndex:
+    """
+    Process-local search index behind /locations/suggestions.
+
+    Holds one row per active locality (with its active city, district and state),
+    ordered by (locality name, id), stored column-wise to keep memory low. Each level's
+    distinct names get an n-gram index, so a case-insensitive substring search is a
+    few posting-list lookups plus a vectorized mask over the rows, and the total
+    match count comes for free. After a write the previous snapshot keeps serving
+    while a replacement is built in the background.
+    """
+
+    def __init__(self):
+        self._locality_ids = []
+        self._locality_names = []
+        self._row_city = np.empty(0, dtype=np.int32)  # row -> index into self._cities
+        self._cities = []
+        self._city_lat = np.empty(0, dtype=np.float64)  # NaN where a city has no coordinates
+        self._city_lng = np.empty(0, dtype=np.float64)
+        self._levels = []  # (NameIndex, row -> name id array)
+        self._version = 0
+        self._built_version = -1
+        self._lock = asyncio.Lock()
+        self._refresh_task = None
+
+    def __len__(self):
+        return len(self._locality_ids)
+
+    @property
+    def is_stale(self) -> bool:
+        return self._built_version != self._version
+
+    def invalidate(self):
+        """Mark the index stale; it is rebuilt on the next search."""
+        self._version += 1
+
+    async def build(self, session: AsyncSession):
+        """Load the active location hierarchy (same shape as location_suggestions) and rebuild."""
+        version = self._version
+        result = await session.execute(
+            select(
+                Locality.id.label("locality_id"),
+                Locality.name.label("locality_name"),
+                City.id.label("city_id"),
+                City.name.label("city_name"),
+                State.id.label("state_id"),
+                State.name.label("state_name"),
+                District.id.label("district_id"),
+                District.name.label("district_name"),
+                City.lat,
+                City.lng,
+            )
+            .join(City, Locality.city_id == City.id)
+            .join(State, City.state_id == State.id)
+            .outerjoin(District, City.district_id == District.id)
+            .where(City.is_active == True,State.is_active==True,Locality.is_active==True,District.is_active==True)
+        )
+
+        locality_ids, locality_names, row_city = [], [], []
+        cities, city_pos = [], {}
+        for r in result:
+            pos = city_pos.get(r.city_id)
+            if pos is None:
+                pos = city_pos[r.city_id] = len(cities)
+                cities.append(
+                    {
+                        "city_id": r.city_id,
+                        "city_name": r.city_name,
+                        "state_id": r.state_id,
+                        "state_name": r.state_name,
+                        "district_id": r.district_id,
+                        "district_name": r.district_name,
+                        "lat": float(r.lat) if r.lat is not None else None,
+                        "lng": float(r.lng) if r.lng is not None else None,
+                    }
+                )
+            locality_ids.append(r.locality_id)
+            locality_names.append(r.locality_name)
+            row_city.append(pos)
+
+        # Sort in python rather than SQL so cursors can be located with bisect regardless of DB collation
+        order = sorted(range(len(locality_ids)), key=lambda i: (locality_names[i], locality_ids[i]))
+        locality_ids = [locality_ids[i] for i in order]
+        locality_names = [locality_names[i] for i in order]
+        row_city = np.asarray(row_city, dtype=np.int32)[order] if order else np.empty(0, dtype=np.int32)
+        # n-gram construction is CPU-bound; keep it off the event loop
+        levels = await asyncio.to_thread(self._build_levels, locality_names, cities, row_city)
+
+        self._locality_ids = locality_ids
+        self._locality_names = locality_names
+        self._row_city = row_city
+        self._cities = cities
+        self._city_lat = np.asarray([np.nan if c["lat"] is None else c["lat"] for c in cities], dtype=np.float64)
+        self._city_lng = np.asarray([np.nan if c["lng"] is None else c["lng"] for c in cities], dtype=np.float64)
+        self._levels = levels
+        self._built_version = version
+        logger.info(f"Location search index built with {len(locality_ids)} localities.")
+
+    @classmethod
+    def _build_levels(cls, locality_names, cities, row_city):
+        levels = [cls._build_level(locality_names, None)]
+        for key in ("city_name", "district_name", "state_name"):
+            levels.append(cls._build_level([c[key] for c in cities], row_city))
+        return levels
+
+    @staticmethod
+    def _build_level(values, row_owner):
+        """Index distinct names of one level; row_owner maps rows to positions in values."""
+        name_ids = {}
+        value_name = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            value_name[i] = name_ids.setdefault((value or "").upper(), len(name_ids))
+        row_name = value_name if row_owner is None else value_name[row_owner]
+        return NameIndex(list(name_ids)), row_name
+
+    async def ensure(self, session: AsyncSession):
+        """Build the index on first use; afterwards refresh stale snapshots in the background."""
+        if not self.is_stale:
+            return
+        if self._built_version < 0:
+            async with self._lock:
+                if self.is_stale:
+                    await self.build(session)
+        elif self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+
+    async def _refresh(self):
+        async with self._lock:
+            if not self.is_stale:
+                return
+            async with async_session() as session:
+                await self.build(session)
+
+    def search(self, query=None) -> np.ndarray:
+        """Return row positions (in index order) whose locality, city, district or state name contains query."""
+        if not query:
+            return np.arange(len(self._locality_ids))
+        term = query.upper()
+        hits = np.zeros(len(self._locality_ids), dtype=bool)
+        for names, row_name in self._levels:
+            matched = names.match(term)
+            if len(matched):
+                mask = np.zeros(len(names.names), dtype=bool)
+                mask[matched] = True
+                hits |= mask[row_name]
+        return np.flatnonzero(hits)
+
+    def position_after(self, name: str, locality_id) -> int:
+        """First row position whose (locality name, id) sorts after the given cursor key."""
+        return bisect.bisect_right(
+            range(len(self._locality_ids)),
+            (name, locality_id),
+            key=lambda i: (self._locality_names[i], self._locality_ids[i]),
+        )
+
+    def nearest_first(self, positions: np.ndarray, lat: float, lng: float, count: int, after=None):
+        """
+        Order matched rows by distance of their city from (lat, lng) and return the first
+        count of them with their distances in meters (NaN when the city has no coordinates).
+
+        Distances are computed once per city and broadcast to rows; ties keep index order.
+        after=(distance, position) resumes strictly after a previous page. A partial
+        partition avoids sorting the whole match set for an early page.
+        """
+        city_dist = haversine_np(lat, lng, self._city_lat, self._city_lng)
+        dist = city_dist[self._row_city[positions]]
+        key = np.where(np.isnan(dist), np.inf, dist)
+        if after is not None:
+            after_dist, after_pos = after
+            keep = (key > after_dist) | ((key == after_dist) & (positions >= after_pos))
+            positions, dist, key = positions[keep], dist[keep], key[keep]
+
+        if count < len(key):
+            # keep every row tied with the count-th distance so ties still break by position
+            cut = np.partition(key, count - 1)[count - 1]
+            candidates = np.flatnonzero(key <= cut)
+        else:
+            candidates = np.arange(len(key))
+        top = candidates[np.argsort(key[candidates], kind="stable")][:count]
+        return positions[top], dist[top]
+
+    def row(self, pos: int) -> dict:
+        """Build the suggestion payload for one row position."""
+        city = self._cities[self._row_city[pos]]
+        return {
+            "locality_id": self._locality_ids[pos],
+            "locality_name": self._locality_names[pos],
+            "city_id": city["city_id"],
+            "city_name": city["city_name"],
+            "state_id": city["state_id"],
+            "state_name": city["state_name"],
+            "district_id": city["district_id"],
+            "district_name": city["district_name"],
+        }
+
+
+location_search_index = LocationSearchIndex()
@@ -1,12 +1,57 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
+from app.core.config import settings
 
-# Create a CryptContext for bcrypt hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+HASH_SCHEMES = ("argon2", "bcrypt")
+
+
+def build_pwd_context() -> CryptContext:
+    """
+    CryptContext for the configured hashing policy.
+
+    PASSWORD_HASH_SCHEME is used for new hashes; every other scheme still verifies but is
+    deprecated, and hashes whose cost parameters differ from the settings count as
+    outdated too, so verify_and_update() hands back a replacement hash for them.
+    """
+    scheme = settings.PASSWORD_HASH_SCHEME
+    if scheme not in HASH_SCHEMES:
+        raise ValueError(f"PASSWORD_HASH_SCHEME must be one of {HASH_SCHEMES}")
+    rounds = settings.PASSWORD_BCRYPT_ROUNDS
+    return CryptContext(
+        schemes=[scheme] + [s for s in HASH_SCHEMES if s != scheme],
+        deprecated="auto",
+        bcrypt__rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+        argon2__type="ID",
+        argon2__time_cost=settings.PASSWORD_ARGON2_TIME_COST,
+        argon2__memory_cost=settings.PASSWORD_ARGON2_MEMORY_KIB,
+        argon2__parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+    )
+
+
+pwd_context = build_pwd_context()
+
+# bcrypt and argon2 release the GIL, so a small thread pool runs hashes in parallel off the event loop
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_hash_metrics = {
+    "in_flight": 0,
+    "max_in_flight": 0,
+    "completed": 0,
+    "rejected": 0,
+    "wait_ms_total": 0.0,
+    "run_ms_total": 0.0,
+}
 
 
 def hash_password(password: str) -> str:
     """
-    Hash a plaintext password using bcrypt.
+    Hash a plaintext password under the configured policy.
     """
     return pwd_context.hash(password)
 
@@ -16,3 +61,75 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Verify a plaintext password against the hashed password.
     """
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def verify_and_update(plain_password: str, hashed_password: str):
+    """
+    Verify a password and, when its hash predates the current policy, rehash it.
+    Returns (valid, new_hash or None).
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+async def _run_hashing(func, *args):
+    """
+    Run a password hash operation on the dedicated pool.
+    Admission control: once PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE operations are
+    pending, new ones are rejected with 503 instead of queueing without bound.
+    """
+    if _hash_metrics["in_flight"] >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE:
+        _hash_metrics["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent password operations, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+    def timed():
+        started = time.perf_counter()
+        return func(*args), started, time.perf_counter()
+
+    def release():
+        _hash_metrics["in_flight"] -= 1
+
+    loop = asyncio.get_running_loop()
+    _hash_metrics["in_flight"] += 1
+    _hash_metrics["max_in_flight"] = max(_hash_metrics["max_in_flight"], _hash_metrics["in_flight"])
+    submitted = time.perf_counter()
+    job = _hash_executor.submit(timed)
+    # Released when the job itself finishes: a cancelled caller (client disconnect) doesn't stop
+    # a running hash, so it must keep counting against admission until the thread is free
+    job.add_done_callback(lambda _: loop.call_soon_threadsafe(release))
+    result, started, finished = await asyncio.wrap_future(job)
+    _hash_metrics["completed"] += 1
+    _hash_metrics["wait_ms_total"] += (started - submitted) * 1000
+    _hash_metrics["run_ms_total"] += (finished - started) * 1000
+    return result
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the password-hash pool; use this inside request handlers."""
+    return await _run_hashing(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the password-hash pool; use this inside request handlers."""
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+
+async def verify_and_update_async(plain_password: str, hashed_password: str):
+    """verify_and_update on the password-hash pool; use this inside request handlers."""
+    return await _run_hashing(verify_and_update, plain_password, hashed_password)
+
+
+def password_hash_metrics() -> dict:
+    """Snapshot of the password-hash pool: load, queueing and timing averages."""
+    completed = _hash_metrics["completed"]
+    return {
+        **_hash_metrics,
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "max_queue": settings.PASSWORD_HASH_MAX_QUEUE,
+        "queued": max(0, _hash_metrics["in_flight"] - settings.PASSWORD_HASH_WORKERS),
+        "avg_wait_ms": _hash_metrics["wait_ms_total"] / completed if completed else 0.0,
+        "avg_run_ms": _hash_metrics["run_ms_total"] / completed if completed else 0.0,
+    }
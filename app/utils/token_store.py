@@ -0,0 +1,88 @@
+import time
+import uuid
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.utils.auth import create_access_token, create_refresh_token, verify_token
+
+# rt:{jti}        -> "active" | "used", expires with the token
+# rtf:{family}    -> "revoked" once any token of a login's rotation chain is reused
+# rtgen:{user_id} -> revoke-all generation; tokens minted under an older one are dead
+TOKEN_KEY = "rt:{}"
+FAMILY_KEY = "rtf:{}"
+GENERATION_KEY = "rtgen:{}"
+REFRESH_TTL_SECONDS = settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600
+
+
+def _unauthorized(detail: str):
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
+
+
+async def issue_tokens(user_id, family: str = None, generation: int = None) -> dict:
+    """
+    Mint an access token and a registered refresh token for user_id.
+    A new login starts a new rotation family at the user's current generation.
+    """
+    redis = await get_redis()
+    if generation is None:
+        generation = int(await redis.get(GENERATION_KEY.format(user_id)) or 0)
+    family = family or uuid.uuid4().hex
+
+    refresh_token = create_refresh_token({"sub": str(user_id), "fam": family, "gen": generation})
+    claims = verify_token(refresh_token, token_type="refresh")
+    await redis.set(TOKEN_KEY.format(claims["jti"]), "active", ex=max(1, int(claims["exp"] - time.time())))
+    return {
+        "access_token": create_access_token({"sub": str(user_id)}),
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+    }
+
+
+async def rotate_refresh_token(refresh_token: str) -> dict:
+    """
+    Exchange a refresh token for a new access/refresh pair; the presented one is spent.
+
+    The token state is swapped to "used" atomically and checked together with the family
+    and user generation in one pipelined round trip. Presenting an already used token is
+    treated as theft: the whole family is revoked, including the thief's fresh token.
+    """
+    claims = verify_token(refresh_token, token_type="refresh")
+    jti, family, user_id = claims.get("jti"), claims.get("fam"), claims.get("sub")
+    if not jti or not family:
+        raise _unauthorized("Refresh token is no longer supported, please log in again")
+
+    redis = await get_redis()
+    pipe = redis.pipeline(transaction=False)
+    pipe.set(TOKEN_KEY.format(jti), "used", xx=True, keepttl=True, get=True)
+    pipe.mget(FAMILY_KEY.format(family), GENERATION_KEY.format(user_id))
+    previous, (family_state, generation) = await pipe.execute()
+    generation = int(generation or 0)
+
+    if family_state is not None or claims.get("gen", 0) != generation:
+        raise _unauthorized("Refresh token revoked")
+    if previous is None:
+        raise _unauthorized("Refresh token expired or unknown")
+    if previous != "active":
+        await revoke_family(family)
+        raise _unauthorized("Refresh token reuse detected, please log in again")
+
+    return await issue_tokens(user_id, family=family, generation=generation)
+
+
+async def revoke_family(family: str):
+    """Revoke every refresh token of one login's rotation chain."""
+    redis = await get_redis()
+    await redis.set(FAMILY_KEY.format(family), "revoked", ex=REFRESH_TTL_SECONDS)
+
+
+async def revoke_refresh_token(refresh_token: str):
+    """Logout: revoke the presented token's family."""
+    claims = verify_token(refresh_token, token_type="refresh")
+    if claims.get("fam"):
+        await revoke_family(claims["fam"])
+
+
+async def revoke_all_tokens(user_id):
+    """Revoke every refresh token of a user (logout everywhere, password change, deactivation)."""
+    redis = await get_redis()
+    await redis.incr(GENERATION_KEY.format(user_id))
@@ -0,0 +1,24 @@
+import sys
+import asyncio
+from app.db.session import async_session, engine
+from app.utils.location_saver import seed_locations, DEFAULT_CITIES_FILE, DEFAULT_MAPPER_FILE
+
+async def run_seed(force: bool = False) -> bool:
+    # Import location CSVs once per deploy; skipped when the files are unchanged
+    async with async_session() as session:
+        imported = await seed_locations(
+            session,
+            cities_file_path=DEFAULT_CITIES_FILE,
+            mapper_file_path=DEFAULT_MAPPER_FILE,
+            force=force,
+        )
+    await engine.dispose()
+    return imported
+
+if __name__ == "__main__":
+    try:
+        imported = asyncio.run(run_seed(force="--force" in sys.argv[1:]))
+        print("Locations imported successfully." if imported else "Locations already up to date.")
+    except Exception as e:
+        print(f"Error during seeding: {e}")
+        sys.exit(1)